@@ -8,9 +8,42 @@ BASE_DIR = _Path(__file__).parent
 
 # include Model in pkg-level namespace
 from .model import Model  # noqa: F401 unused import
+from .batch import ColumnBatch  # noqa: F401 unused import
+from .stepper import Stepper  # noqa: F401 unused import
+
+
+_SUBMODULES = frozenset(
+    [
+        "batch",
+        "cases",
+        "data",
+        "diagnostics",
+        "kernels",
+        "leaf_angle",
+        "leaf_area",
+        "model",
+        "mpi",
+        "shared",
+        "solar",
+        "solvers",
+        "spectra",
+        "stepper",
+        "utils",
+        "variables",
+    ]
+)
+
+
+def __getattr__(name):
+    # submodules not needed by `Model` (e.g., diagnostics, which imports matplotlib,
+    # pandas, and xarray) are imported on first access
+    if name in _SUBMODULES:
+        import importlib
+
+        return importlib.import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# include diagnostics module (not used by any of the others)
-from . import diagnostics  # noqa: F401 unused import
 
 # set version
 try:
@@ -0,0 +1,461 @@
+"""
+This module contains :class:`ColumnBatch`, which can be used to solve CRT problems
+for many canopy columns at once (e.g., the cells of a land-surface model grid),
+without creating a :class:`~crt1d.Model` for each.
+"""
+import traceback
+import warnings
+from copy import copy
+from copy import deepcopy
+
+import numpy as np
+
+from .model import _as_dtype
+from .model import _DTYPE_ARGS
+from .model import Model
+from .solvers import RET_KEYS_ALL_SCHEMES
+
+__all__ = ("ColumnBatch", "run_dataset")
+
+
+COLUMN_KEYS = ("lai", "psi", "clump", "I_dr0_all", "I_df0_all", "leaf_t", "leaf_r", "soil_r")
+"""Model inputs that can vary by column. The others are shared by all columns."""
+
+_BAND_KEYS = ("I_dr0_all", "I_df0_all", "leaf_t", "leaf_r", "soil_r")
+# ^ column inputs with a waveband dimension
+
+
+class ColumnBatch:
+    """A batch of canopy columns that share the vertical grid, wavebands and leaf angle
+    distribution, solved together.
+
+    Inputs that vary by column (:const:`COLUMN_KEYS`) have a leading column dimension:
+    `lai` ``(ncol, nz)``, `psi` and `clump` ``(ncol,)``,
+    and the top-of-canopy irradiance and optical property spectra broadcastable to
+    ``(ncol, nwl)``.
+    `clump` can only be set by column for schemes that use it (``'zq_pa'``).
+    Column inputs that have not been set are taken from the shared parameters.
+    Shared parameters are stored (and validated) by an underlying :class:`~crt1d.Model`,
+    :attr:`model`.
+
+    For schemes that support it (``batched`` in :const:`~crt1d.solvers.AVAILABLE_SCHEMES`),
+    all columns are solved in one solver call. For the others, the solver is called
+    for each column.
+    """
+
+    def __init__(self, scheme="2s", nlayers=60, **p_kwargs):
+        """
+        Parameters
+        ----------
+        scheme : str
+            Identifier for the desired canopy radiative transfer scheme.
+        nlayers : int
+            Number of in-canopy layers to use in the solver (interface levels).
+        **p_kwargs
+            Column and shared parameter keyword arguments passed on to :meth:`update_p()`.
+        """
+        self._init(Model(scheme, nlayers=nlayers), p_kwargs)
+
+    @classmethod
+    def from_model(cls, m, **p_kwargs):
+        """Create a batch with the scheme and shared parameters of model `m` (copied).
+
+        Parameters
+        ----------
+        m : Model
+        **p_kwargs
+            Column and shared parameter keyword arguments passed on to :meth:`update_p()`.
+        """
+        b = cls.__new__(cls)
+        b._init(deepcopy(m), p_kwargs)
+        return b
+
+    def _init(self, model, p_kwargs):
+        self.model = model
+        """Model holding the scheme and shared parameters."""
+
+        self._pc = {}  # column inputs that have been set
+        self.ncol = 1
+
+        if p_kwargs:
+            self.update_p(**p_kwargs)
+
+        self._run_count = 0
+
+        self.out = {}
+        """Scheme standard outputs, with leading column dimension."""
+
+        self.out_extra = {}
+        """Scheme extra outputs, with leading column dimension."""
+
+    @property
+    def scheme(self):
+        return self.model.scheme
+
+    def __repr__(self):
+        scheme_name = self.scheme["name"]
+        return f"ColumnBatch(scheme={scheme_name!r}, ncol={self.ncol})"
+
+    def update_p(self, **kwargs):
+        """Update column and shared parameters, if the validation passes.
+
+        Parameters
+        ----------
+        `**kwargs`
+            Used to update the parameters.
+            Column inputs (:const:`COLUMN_KEYS`) are stored here,
+            the others are passed to :meth:`Model.update_p`.
+        """
+        try:
+            # validate on a trial copy of the model first, so that nothing is applied
+            # unless both the shared and the column inputs are valid
+            m = self.model
+            shared = {k: v for k, v in kwargs.items() if k not in COLUMN_KEYS}
+            if shared:
+                m = copy(m)
+                m._p = dict(m._p)  # parameter values are replaced, not modified
+                m._changed = set(m._changed)
+                m._solver_cache = dict(m._solver_cache)
+                m._update_p(shared)
+
+            pc = dict(self._pc)
+            for k, v in kwargs.items():
+                if k not in COLUMN_KEYS:
+                    continue
+                v = np.asarray(v, dtype=float)
+                pc[k] = np.atleast_2d(v) if k == "lai" or k in _BAND_KEYS else v.reshape(-1)
+
+            ncol = _check_columns(pc, m)
+
+        except Exception:
+            warnings.warn(
+                f"Updating parameters failed. "
+                f"Full traceback:\n\n{traceback.format_exc()}\n"
+                "Reverting."
+            )
+
+        else:
+            self.model = m
+            self._pc = pc
+            self.ncol = ncol
+
+        return self  # for chaining
+
+    def _columns(self, cols):
+        """Batch of the columns `cols` (slice or index array) of this one, sharing the model."""
+        b = ColumnBatch.__new__(ColumnBatch)
+        b._init(self.model, {})
+        pc = self._column_inputs()
+        b._pc = {k: np.asarray(pc[k][cols]) for k in self._pc}
+        b._check_inputs()
+        return b
+
+    def _column_inputs(self):
+        """Column inputs, broadcast to ``(ncol, ...)``, using the shared values for
+        those that have not been set."""
+        return _broadcast_columns(self._pc, self.model._p, self.ncol)
+
+    def _check_inputs(self):
+        """Check the column inputs against each other and the shared parameters."""
+        self.ncol = _check_columns(self._pc, self.model)
+
+    def run(self, **extra_solver_kwargs):
+        """Run the scheme for all columns.
+
+        Columns with the sun below the horizon (``psi >= pi/2``) are not solved;
+        their outputs are set to zero.
+        If no column has the sun above the horizon, the scheme is not called
+        and :attr:`out_extra` is left empty.
+
+        Parameters
+        ----------
+        **extra_solver_kwargs
+            Passed on to the solver, e.g. scheme options.
+        """
+        pc = self._column_inputs()
+        day = pc["psi"] < np.pi / 2
+        if day.all():
+            sol = self._solve(pc, self.ncol, extra_solver_kwargs)
+        else:
+            nday = np.count_nonzero(day)
+            sol_day = {}
+            if nday > 0:
+                sol_day = self._solve({k: v[day] for k, v in pc.items()}, nday, extra_solver_kwargs)
+            shape = (self.ncol, self.model.nlev, self.model.nwl)
+            sol = {k: np.zeros(shape, dtype=self.model.dtype) for k in RET_KEYS_ALL_SCHEMES}
+            for k, v in sol_day.items():
+                sol[k] = np.zeros((self.ncol,) + v.shape[1:], dtype=v.dtype)
+                sol[k][day] = v
+
+        self.out.update({k: v for k, v in sol.items() if k in RET_KEYS_ALL_SCHEMES})
+        self.out_extra = {
+            f"{k}_scheme": v for k, v in sol.items() if k not in RET_KEYS_ALL_SCHEMES
+        }  # replaced, so that none are left from a previous run
+
+        self._run_count += 1
+
+        return self  # for chaining
+
+    def _solve(self, pc, ncol, extra_solver_kwargs):
+        """Solve for the `ncol` columns with inputs `pc` (``(ncol, ...)``)."""
+        scheme = self.scheme
+        solver = self.model._get_solver()
+        p = self.model._p
+
+        dtype = self.model.dtype
+        pc = {k: v.astype(dtype, copy=False) if k in _DTYPE_ARGS else v for k, v in pc.items()}
+        args_shared = {
+            k: np.asarray(p[k], dtype=dtype) if k in _DTYPE_ARGS else p[k]
+            for k in scheme["args"]
+            if k not in COLUMN_KEYS
+        }
+        keys_col = [k for k in scheme["args"] if k in COLUMN_KEYS]
+
+        if scheme["batched"]:
+            # columns as a batch dimension between levels and bands: profiles (nz, ncol, nwl)
+            args = {k: pc[k] for k in keys_col}
+            args["lai"] = pc["lai"].T[:, :, np.newaxis]
+            for k in ("psi", "clump"):
+                if k in args:
+                    args[k] = pc[k][:, np.newaxis]
+            sol = solver(**args_shared, **args, **extra_solver_kwargs)
+            sol = {k: np.moveaxis(v, 0, 1) if np.ndim(v) == 3 else v for k, v in sol.items()}
+        else:
+            sols = [
+                solver(**args_shared, **{k: pc[k][i] for k in keys_col}, **extra_solver_kwargs)
+                for i in range(ncol)
+            ]
+            sol = {k: np.stack([sol_i[k] for sol_i in sols]) for k in sols[0]}
+
+        return {k: _as_dtype(v, dtype) for k, v in sol.items()}
+
+    def to_xr(self, *, info=""):
+        """Construct and return an :class:`xarray.Dataset`,
+        like :meth:`Model.to_xr` but with a leading ``column`` dimension.
+
+        Parameters
+        ----------
+        info : str
+            Extra information about the run/model to be stored in the dataset.
+        """
+        import xarray as xr
+
+        import crt1d
+
+        if self._run_count == 0:
+            raise Exception("Must run the model before creating the dataset.")
+        vmd = self.model.vmd
+        p = self.model._p
+        pc = self._column_inputs()
+        out = self.out
+
+        def tup(name, data):
+            return vmd[name].dv_tuple(data)
+
+        def tup_col(name, data):
+            dims, _, attrs = vmd[name].dv_tuple(data)
+            return (("column", *dims), data, attrs)
+
+        lai = pc["lai"]
+        psi = pc["psi"]
+
+        # scheme's absorption
+        abs_data_vars = {}
+        for name, arr in self.out_extra.items():
+            if name[:2] != "aI":
+                continue
+            n_z = arr.shape[1]
+            if n_z == p["z"].size:  # some schemes provide absorption on interface levels
+                dims = ("column", "z", "wl")
+            elif n_z == p["zm"].size:
+                dims = ("column", "zm", "wl")
+            else:
+                raise ValueError("Scheme absorption output has too many or too few levels.")
+            abs_data_vars[name] = (dims, arr, vmd[name[:-7]].da_attrs())
+
+        dset = xr.Dataset(
+            coords={
+                "column": ("column", np.arange(self.ncol), {"long_name": "Canopy column"}),
+                "z": tup("z", p["z"]),
+                "wl": tup("wl", p["wl"]),
+                "zm": tup("zm", p["zm"]),
+                "wle": tup("wle", p["wle"]),
+            },
+            data_vars={
+                "I_dr": tup_col("I_dr", out["I_dr"]),
+                "I_df_d": tup_col("I_df_d", out["I_df_d"]),
+                "I_df_u": tup_col("I_df_u", out["I_df_u"]),
+                "F": tup_col("F", out["F"]),
+                "I_d": tup_col("I_d", out["I_dr"] + out["I_df_d"]),
+                "dwl": tup("dwl", p["dwl"]),
+                "lai": tup_col("lai", lai),
+                "dlai": tup_col("dlai", lai[:, :-1] - lai[:, 1:]),
+                #
+                **abs_data_vars,
+                #
+                "psi": tup_col("psi", psi),
+                "sza": tup_col("sza", np.rad2deg(psi)),
+                "G": tup_col("G", p["G_fn"](psi)),
+                "K_b": tup_col("K_b", p["K_b_fn"](psi)),
+            },
+            attrs={
+                "info": info,
+                "scheme_name": self.scheme["name"],
+                "scheme_long_name": self.scheme["long_name"],
+                "scheme_short_name": self.scheme["short_name"],
+                "crt1d_version": crt1d.__version__,
+            },
+        )
+        return dset
+
+
+def _broadcast_columns(pc, p, ncol):
+    """Column inputs `pc` broadcast to ``(ncol, ...)``, using the shared values in `p`
+    for those that have not been set."""
+    pcb = {}
+    for k in COLUMN_KEYS:
+        try:
+            v = pc[k]
+        except KeyError:
+            v = np.asarray(p[k], dtype=float)[np.newaxis, ...]
+        pcb[k] = np.broadcast_to(v, (ncol,) + v.shape[1:])
+
+    return pcb
+
+
+def _check_columns(pc, m):
+    """Check the column inputs `pc` against each other and the shared parameters
+    of model `m`, returning the number of columns."""
+    p = m._p
+
+    ncols = [v.shape[0] for v in pc.values()]
+    ncol = max(ncols, default=1)
+    assert all(n in (1, ncol) for n in ncols), "column dimensions do not match"
+    assert "clump" not in pc or "clump" in m.scheme["args"], (
+        f"scheme {m.scheme['name']!r} does not use `clump`, " "so it cannot be set by column"
+    )
+
+    pcb = _broadcast_columns(pc, p, ncol)
+    lai = pcb["lai"]
+    assert lai.shape[1] == p["z"].size
+    assert np.all(lai[:, 0] > lai[:, -1])  # LAI decreasing
+    assert np.all(lai[:, -1] == 0)
+    nwl = p["wl"].size
+    assert all(pcb[k].shape[1] == nwl for k in _BAND_KEYS)
+    assert np.all(pcb["psi"] >= 0)  # columns with psi >= pi/2 (night) are not solved
+
+    return ncol
+
+
+def run_dataset(m0, ds, **run_kwargs):
+    """Run model `m0` for the cases described by the variables of `ds`,
+    mapping the solver over the chunks if `ds` is dask-backed.
+
+    Variables of `ds` with names in :const:`COLUMN_KEYS` replace the corresponding
+    parameters of `m0`: `lai` with dim ``z``, the spectra with dim ``wl``,
+    and `psi` and `clump` with neither.
+    All of their other dims (e.g., ensemble member or time) are broadcast against each other
+    and are dims of the outputs.
+    Each block is solved as a :class:`ColumnBatch` (using :func:`xarray.apply_ufunc`),
+    so with dask-chunked inputs, the result is lazy and can be computed in parallel
+    or streamed to disk (e.g. with :meth:`xarray.Dataset.to_netcdf`).
+
+    Parameters
+    ----------
+    m0 : Model
+        Base case, providing the scheme and the other parameters (not modified).
+    ds : xarray.Dataset
+        Inputs. The ``z`` and ``wl`` dims must not be chunked.
+    **run_kwargs
+        Passed on to :meth:`ColumnBatch.run`.
+
+    Returns
+    -------
+    xarray.Dataset
+        Following the :meth:`Model.to_xr` schema, with the additional dims of the inputs.
+    """
+    import xarray as xr
+
+    import crt1d
+
+    m0._check_inputs()
+    p = m0._p
+    vmd = m0.vmd
+    nz, nwl = m0.nlev, m0.nwl
+    if "wl" in ds.coords and not np.allclose(ds["wl"], p["wl"]):
+        raise ValueError("`ds` wavelengths are not consistent with the model's.")
+
+    keys = [k for k in COLUMN_KEYS if k in ds.data_vars]
+    if not keys:
+        raise ValueError(f"`ds` should have one or more of: {', '.join(COLUMN_KEYS)}.")
+    core_dims = {k: ["z"] if k == "lai" else ["wl"] if k in _BAND_KEYS else [] for k in keys}
+
+    def f(*arrs):
+        shapes = [a.shape[: a.ndim - len(core_dims[k])] for k, a in zip(keys, arrs)]
+        batch_shape = np.broadcast_shapes(*shapes)
+        ncol = int(np.prod(batch_shape))
+        if ncol == 0:
+            return tuple(
+                np.empty(batch_shape + (nz, nwl), dtype=m0.dtype) for _ in RET_KEYS_ALL_SCHEMES
+            )
+
+        b = ColumnBatch.from_model(m0)
+        for k, a, shape in zip(keys, arrs, shapes):
+            core_shape = a.shape[len(shape) :]
+            b._pc[k] = np.broadcast_to(a, batch_shape + core_shape).reshape((ncol,) + core_shape)
+        b._check_inputs()  # raise instead of reverting like `update_p`
+        b.run(**run_kwargs)
+
+        return tuple(b.out[k].reshape(batch_shape + (nz, nwl)) for k in RET_KEYS_ALL_SCHEMES)
+
+    outs = xr.apply_ufunc(
+        f,
+        *(ds[k] for k in keys),
+        input_core_dims=[core_dims[k] for k in keys],
+        output_core_dims=[["z", "wl"]] * len(RET_KEYS_ALL_SCHEMES),
+        dask="parallelized",
+        output_dtypes=[m0.dtype] * len(RET_KEYS_ALL_SCHEMES),
+        dask_gufunc_kwargs={"output_sizes": {"z": nz, "wl": nwl}},
+    )
+
+    def tup(name, data):
+        return vmd[name].dv_tuple(data)
+
+    def da(name, x):
+        return x.assign_attrs(vmd[name].da_attrs())
+
+    out = dict(zip(RET_KEYS_ALL_SCHEMES, outs))
+
+    psi = ds["psi"] if "psi" in keys else xr.DataArray(p["psi"])
+    lai = ds["lai"] if "lai" in keys else xr.DataArray(p["lai"], dims="z")
+    dlai = -lai.diff("z", label="lower").rename(z="zm")
+
+    def G_fn(x):
+        return xr.apply_ufunc(p["G_fn"], x, dask="parallelized", output_dtypes=[float])
+
+    dset = xr.Dataset(
+        data_vars={
+            **{k: da(k, v) for k, v in out.items()},
+            "I_d": da("I_d", out["I_dr"] + out["I_df_d"]),
+            "dwl": tup("dwl", p["dwl"]),
+            "lai": da("lai", lai),
+            "dlai": da("dlai", dlai),
+            "psi": da("psi", psi),
+            "sza": da("sza", np.rad2deg(psi)),
+            "G": da("G", G_fn(psi)),
+            "K_b": da("K_b", G_fn(psi) / np.cos(psi)),
+        },
+        attrs={
+            "info": "",
+            "scheme_name": m0.scheme["name"],
+            "scheme_long_name": m0.scheme["long_name"],
+            "scheme_short_name": m0.scheme["short_name"],
+            "crt1d_version": crt1d.__version__,
+        },
+    )
+    return dset.assign_coords(
+        z=tup("z", p["z"]),
+        wl=tup("wl", p["wl"]),
+        zm=tup("zm", p["zm"]),
+        wle=tup("wle", p["wle"]),
+    )
@@ -5,7 +5,7 @@ import numpy as np
 
 from . import data
 from .data import DATA_BASE_DIR
-from .leaf_angle import G_ellipsoidal_approx
+from .leaf_angle import Ellipsoidal
 from .leaf_angle import mla_to_x_approx as mla_to_orient
 from .leaf_area import distribute_lai_beta
 from .leaf_area import distribute_lai_from_cdd
@@ -21,12 +21,13 @@ def load_default_case(nlayers):
 
     # default spectral things,
     # dropping wavelengths where something is NaN (missing / not defined)
-    ds = data.load_default(midpt=True).dropna(dim="wl")
+    # (loaded as arrays, like `data.load_default(midpt=True).dropna(dim="wl")`)
+    ds = data._load_default_arrays(midpt=True)
 
     # leaf angle
     mla = 57  # approximately the value for spherical leaf angle dist
     orient = mla_to_orient(mla)
-    G_fn = lambda psi_: G_ellipsoidal_approx(psi_, orient)  # noqa: E731
+    G_fn = Ellipsoidal(orient, approx=True)
 
     # Solar zenith angle
     sza = 20  # deg.
@@ -43,15 +44,15 @@ def load_default_case(nlayers):
         G_fn=G_fn,
         psi=psi,
         #
-        leaf_t=ds.tl.values,
-        leaf_r=ds.rl.values,
-        soil_r=ds.rs.values,
-        wl_leafsoil=ds.wl.values,
+        leaf_t=ds["tl"],
+        leaf_r=ds["rl"],
+        soil_r=ds["rs"],
+        wl_leafsoil=ds["wl"],
         #
-        I_dr0_all=ds.I_dr.values,
-        I_df0_all=ds.I_df.values,
-        wl=ds.wl.values,
-        dwl=ds.dwl.values,
+        I_dr0_all=ds["I_dr"],
+        I_df0_all=ds["I_df"],
+        wl=ds["wl"],
+        dwl=ds["dwl"],
     )
 
     return p
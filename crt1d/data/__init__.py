@@ -7,9 +7,7 @@ Data are loaded as :class:`xarray.Dataset` for easy inspection.
 from pathlib import Path as _Path
 
 import numpy as np
-import xarray as xr
 
-from ..spectra import _edges_from_centers
 from ..variables import _tup
 from ..variables import _wl_coord_dict
 from ._external import leaf_ps5  # noqa: F401 unused import
@@ -20,13 +18,22 @@ DATA_BASE_DIR = _Path(__file__).parent
 DATA_DIR_STR = DATA_BASE_DIR.as_posix()
 
 
-def load_soil_fuentes2007(wl_um):
-    """PAR and NIR values, applied to the wavelengths in `wl_um`."""
+def _soil_fuentes2007(wl_um):
     wl_um = np.asarray(wl_um)
     r_soil = np.ones_like(wl_um)
     r_soil[wl_um <= 0.7] = 0.1100  # this is the PAR value
     r_soil[wl_um > 0.7] = 0.2250  # near-IR value
 
+    return r_soil
+
+
+def load_soil_fuentes2007(wl_um):
+    """PAR and NIR values, applied to the wavelengths in `wl_um`."""
+    import xarray as xr
+
+    wl_um = np.asarray(wl_um)
+    r_soil = _soil_fuentes2007(wl_um)
+
     attrs = {}
     return xr.Dataset(
         coords=_wl_coord_dict(wl_um),
@@ -47,6 +54,8 @@ def load_prosail_sample_soil(*, f_wet=0):
     -----
     https://github.com/jgomezdans/prosail/blob/master/prosail/soil_reflectance.txt
     """
+    import xarray as xr
+
     rho_soil_dry, rho_soil_wet = np.loadtxt(DATA_BASE_DIR / "PROSAIL_sample-soil.txt", unpack=True)
     wl_ps5 = load_default_ps5()["wl"]
 
@@ -72,6 +81,8 @@ def load_default_ps5():
 
     (I believe) these are the default spectra for the online version of PROSPECT.
     """
+    import xarray as xr
+
     wl_nm, r, t = np.loadtxt(DATA_BASE_DIR / "PROSPECT_sample.txt", unpack=True)
     wl = wl_nm / 1000.0  # nm->um
 
@@ -87,8 +98,7 @@ def load_default_ps5():
     return ds
 
 
-def load_ideal_leaf(*, midpt=False):
-    """Load the ideal green leaf properties (at SPCTRAL2 wavelengths)."""
+def _ideal_leaf(midpt):
     fpath = DATA_BASE_DIR / "ideal-green-leaf_SPCTRAL2-wavelengths.csv"
     wl, t, r = np.loadtxt(fpath, delimiter=",", skiprows=1, unpack=True)
 
@@ -101,6 +111,15 @@ def load_ideal_leaf(*, midpt=False):
         t = (t[:-1] + t[1:]) / 2
         r = (r[:-1] + r[1:]) / 2
 
+    return wl, t, r
+
+
+def load_ideal_leaf(*, midpt=False):
+    """Load the ideal green leaf properties (at SPCTRAL2 wavelengths)."""
+    import xarray as xr
+
+    wl, t, r = _ideal_leaf(midpt)
+
     attrs = {}
     ds = xr.Dataset(
         coords=_wl_coord_dict(wl),
@@ -113,25 +132,8 @@ def load_ideal_leaf(*, midpt=False):
     return ds
 
 
-def load_default_sp2(*, midpt=True):
-    """Load sample SPCTRAL2 top-of-canopy spectra (direct and diffuse).
-
-    This is the default spectrum in the Excel version of SPCTRAL2.
-
-    Parameters
-    ----------
-    midpt : bool, optional
-        true (default): irradiance calculated at midpts of the original grid
-
-        false: irradiance calculated by estimating the edges of the original grid
-        and treating the original grid as centers
-
-    Notes
-    -----
-    The SPCTRAL2 irradiances are in spectral form: W m-2 μm-1,
-    but we need in-band irradiance for the solvers, since some compute W/m2 absorption.
-    """
-    # load original spectra
+def _default_sp2(midpt):
+    # original spectra
     fp = DATA_BASE_DIR / "SPCTRAL2_xls_default-spectrum.csv"
     wl0, SI_dr0, SI_df0 = np.loadtxt(fp, delimiter=",", skiprows=1, unpack=True)
 
@@ -147,6 +149,8 @@ def load_default_sp2(*, midpt=True):
         I_df = (SI_df0[:-1] + SI_df0[1:]) / 2 * dwl
 
     else:  # edges-from-centers method
+        from ..spectra import _edges_from_centers
+
         wle = _edges_from_centers(wl0)
         dwl = np.diff(wle)
         wl = wl0  # for in-band irradiance (and original spectral irradiance)
@@ -155,6 +159,35 @@ def load_default_sp2(*, midpt=True):
         I_dr = SI_dr0 * dwl
         I_df = SI_df0 * dwl
 
+    return dict(
+        wl0=wl0, SI_dr0=SI_dr0, SI_df0=SI_df0, wl=wl, wle=wle, dwl=dwl, I_dr=I_dr, I_df=I_df
+    )
+
+
+def load_default_sp2(*, midpt=True):
+    """Load sample SPCTRAL2 top-of-canopy spectra (direct and diffuse).
+
+    This is the default spectrum in the Excel version of SPCTRAL2.
+
+    Parameters
+    ----------
+    midpt : bool, optional
+        true (default): irradiance calculated at midpts of the original grid
+
+        false: irradiance calculated by estimating the edges of the original grid
+        and treating the original grid as centers
+
+    Notes
+    -----
+    The SPCTRAL2 irradiances are in spectral form: W m-2 μm-1,
+    but we need in-band irradiance for the solvers, since some compute W/m2 absorption.
+    """
+    import xarray as xr
+
+    sp2 = _default_sp2(midpt)
+    wl0, SI_dr0, SI_df0 = sp2["wl0"], sp2["SI_dr0"], sp2["SI_df0"]
+    wl, wle, dwl, I_dr, I_df = sp2["wl"], sp2["wle"], sp2["dwl"], sp2["I_dr"], sp2["I_df"]
+
     dimsx = "wl"  # band edges / actual spectrum tracing
     dims0 = "wl0"  # band centers
     Sunits = "W m-2 μm-1"  # spectral units
@@ -197,6 +230,8 @@ def load_default(*, midpt=True):
 
     * :func:`load_soil_fuentes2007`
     """
+    import xarray as xr
+
     # load individual datasets
     ds_l = load_ideal_leaf(midpt=midpt)
     ds_r = load_default_sp2(midpt=midpt)  # toc irradiance
@@ -215,3 +250,22 @@ def load_default(*, midpt=True):
     ds = xr.merge([ds_l, ds_r, ds_s])
 
     return ds
+
+
+def _load_default_arrays(*, midpt=True):
+    """The ``wl`` variables of :func:`load_default`, as a dict of NumPy arrays,
+    dropping wavelengths where any of them are NaN (missing / not defined).
+    This avoids importing xarray for the default model case."""
+    wl, t, r = _ideal_leaf(midpt)
+    sp2 = _default_sp2(midpt)  # toc irradiance
+    rs = _soil_fuentes2007(wl)  # soil, using the leaf wavelengths
+
+    # make sure the grids are the same
+    assert np.allclose(wl, sp2["wl"])
+
+    d = dict(rl=r, tl=t, I_dr=sp2["I_dr"], I_df=sp2["I_df"], dwl=sp2["dwl"], rs=rs)
+    keep = ~np.any([np.isnan(v) for v in d.values()], axis=0)
+    d = {k: v[keep] for k, v in d.items()}
+    d["wl"] = wl[keep]
+
+    return d
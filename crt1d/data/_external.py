@@ -4,7 +4,6 @@ Create spectral input data using external packages.
 import warnings
 
 import numpy as np
-import xarray as xr
 
 from ..variables import _tup
 from ..variables import _wl_coord_dict
@@ -49,6 +48,7 @@ def leaf_ps5(n=1.2, cab=30.0, car=10.0, cbr=1.0, ewt=0.015, lma=0.009):
     Quoted typical ranges are based on the PROSPECT page and Python PROSAIL readme linked above.
     """
     import prosail
+    import xarray as xr
 
     wl_nm, r, t = prosail.run_prospect(n, cab, car, cbr, ewt, lma, prospect_version="5")
 
@@ -137,6 +137,7 @@ def solar_sp2(
         Dataset containing the spectra, solar zenith angle, and time/location info.
     """
     import solar_utils
+    import xarray as xr
 
     # tilt and aspect (azimuth angle) of collector panel
     # aspect: S=180, N=0, E=90, W=270
@@ -0,0 +1,117 @@
+"""
+Kernels for the inherently sequential loops
+(the Thomas algorithm sweeps of :class:`~crt1d.solvers.common.TridiagFactor`,
+used by :func:`~crt1d.solvers.common.tdma` and the Norman (1979) scheme,
+and the bin loop of :func:`~crt1d.spectra.smear_tuv`),
+with a NumPy implementation (the default)
+and one JIT-compiled with `Numba <https://numba.pydata.org/>`_, if it is installed.
+
+The Numba kernels are compiled on first use.
+Select them for a single run with ``Model.run(kernels='numba')``,
+or for a block of code with :func:`use`.
+The setting is a context variable, so it is local to the thread (or task)
+that sets it.
+"""
+import contextlib
+import contextvars
+import importlib.util
+import warnings
+
+__all__ = ("AVAILABLE", "current", "use")
+
+
+AVAILABLE = ("numpy", "numba") if importlib.util.find_spec("numba") is not None else ("numpy",)
+"""Names of the kernel implementations that can be used."""
+
+_state = contextvars.ContextVar("crt1d_kernels", default="numpy")
+
+_compiled = {}
+
+
+def current():
+    """Name of the kernel implementation in use."""
+    return _state.get()
+
+
+@contextlib.contextmanager
+def use(name):
+    """Context manager for using kernel implementation `name` (``'numpy'`` or ``'numba'``).
+
+    If Numba is requested but not installed, a warning is issued
+    and the NumPy kernels are used instead.
+    """
+    if name not in ("numpy", "numba"):
+        raise ValueError(f"invalid kernels {name!r}. Valid options: 'numpy', 'numba'.")
+    if name not in AVAILABLE:
+        warnings.warn(f"{name!r} kernels are not available (not installed), using 'numpy'.")
+        name = "numpy"
+
+    token = _state.set(name)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def numba_kernel(name):
+    """The compiled version of the kernel function `name` from this module."""
+    try:
+        return _compiled[name]
+    except KeyError:
+        import numba
+
+        fn = _compiled[name] = numba.njit(cache=True)(globals()[name])
+        return fn
+
+
+# The kernels below are written for Numba (explicit loops over scalars).
+# Arrays are 2-D, ``(n, m)``, with the tridiagonal systems along the first axis
+# and `m` independent systems, and outputs are passed in.
+
+
+def thomas_factor(a, b, c, e, den):
+    n, m = a.shape
+    for j in range(m):
+        den[0, j] = b[0, j]
+        e[0, j] = c[0, j] / b[0, j]
+    for i in range(1, n):
+        for j in range(m):
+            den[i, j] = b[i, j] - a[i, j] * e[i - 1, j]
+            if i < n - 1:
+                e[i, j] = c[i, j] / den[i, j]
+
+
+def thomas_solve(a, e, den, d, u):
+    n, m = a.shape
+    f = u  # the forward sweep values are overwritten in the back substitution
+    for j in range(m):
+        f[0, j] = d[0, j] / den[0, j]
+    for i in range(1, n):
+        for j in range(m):
+            f[i, j] = (d[i, j] - a[i, j] * f[i - 1, j]) / den[i, j]
+    for i in range(n - 2, -1, -1):
+        for j in range(m):
+            u[i, j] = f[i, j] - e[i, j] * u[i + 1, j]
+
+
+def smear_tuv(x, y, bins, ynew):
+    # As `crt1d.spectra._smear_tuv_1` for each bin
+    for i in range(bins.size - 1):
+        xl = bins[i]
+        xu = bins[i + 1]
+        area = 0.0
+        for k in range(x.size - 1):
+            if x[k + 1] < xl:
+                continue
+            if x[k] > xu:
+                break
+
+            a1 = max(x[k], xl)
+            a2 = min(x[k + 1], xu)
+
+            slope = (y[k + 1] - y[k]) / (x[k + 1] - x[k])
+            b1 = y[k] + slope * (a1 - x[k])
+            b2 = y[k] + slope * (a2 - x[k])
+            area = area + (a2 - a1) * (b2 + b1) / 2
+
+        ynew[i] = area / (xu - xl)
@@ -16,10 +16,19 @@ where :math:`\psi` is the solar zenith angle and :math:`K_b = K_b(\psi), G = G(\
 :math:`G(\psi)` functions are derived from these distributions.
 The azimuth angle is usually assumed to have a uniform distribution
 and so does not have an impact.
+
+The leaf angle distribution of a :class:`~crt1d.Model` (parameter ``G_fn``)
+can be any function computing :math:`G(\psi)`, but the specs
+(:class:`Spherical`, :class:`Ellipsoidal`, :class:`Bonan`, ...) are preferred,
+since they can be pickled and hashed, unlike lambdas.
+For example, ``Model(G_fn=Ellipsoidal(x=1.5))``.
 """
+import abc
+from dataclasses import dataclass
+
 import numpy as np
-from scipy import integrate
-from scipy import optimize
+
+from .utils import array_namespace
 
 PI = np.pi
 
@@ -82,6 +91,8 @@ def mla_from_g(g_fn):
     r"""Calculate (estimate) the mean leaf inclination angle (deg.)
     by numerically integrating the distribution's PDF: :math:`g(\psi)`.
     """
+    from scipy import integrate
+
     theta_l_bar = integrate.quad(lambda x: x * g_fn(x), 0, PI / 2)[0]  # returns (y, err)
     return np.rad2deg(theta_l_bar)
 
@@ -94,6 +105,8 @@ def xl_from_g(g_fn):
 
     :cite:t:`bonan_climate_2019` eq. 2.16
     """
+    from scipy import integrate
+
     xl = 0.5 * integrate.quad(
         lambda theta_l: np.abs(np.sin(theta_l) - g_fn(theta_l)),
         0,
@@ -113,7 +126,7 @@ def xl_from_g(g_fn):
 
 def G_horizontal(psi):
     r""":math:`G(\psi)` for horizontal leaves."""
-    return np.cos(psi)
+    return array_namespace(psi).cos(psi)
 
 
 def G_spherical(psi):
@@ -123,7 +136,7 @@ def G_spherical(psi):
 
 def G_vertical(psi):
     r""":math:`G(\psi)` for vertical leaves."""
-    return 2 / PI * np.sin(psi)
+    return 2 / PI * array_namespace(psi).sin(psi)
 
 
 def G_ellipsoidal(psi, x):
@@ -140,14 +153,15 @@ def G_ellipsoidal(psi, x):
         b/a -- the ratio of ellipse horizontal semixaxis length to vertical,
         s.t. `x` > 1 indicates an oblate spheroid.
     """
+    xp = array_namespace(psi)
     if x == 1:  # => spherical
-        res = np.full_like(psi, G_spherical(psi))  # allow psi array input
-        return float(res) if res.size == 1 else res
+        res = xp.full_like(psi, G_spherical(psi), dtype=float)  # allow psi array input
+        return float(res) if xp is np and res.size == 1 else res
         # TODO: maybe create helper fn for this issue
 
     phi = PI / 2 - psi  # elevation angle
 
-    p1 = np.sqrt(x ** 2 + 1 / (np.tan(phi) ** 2))  # numerator
+    p1 = xp.sqrt(x ** 2 + 1 / (xp.tan(phi) ** 2))  # numerator
     if x > 1:
         eps1 = np.sqrt(1 - x ** -2)
         p2 = x + 1 / (2 * eps1 * x) * np.log((1 + eps1) / (1 - eps1))  # denom
@@ -158,7 +172,7 @@ def G_ellipsoidal(psi, x):
 
     K = p1 / p2
 
-    return K * np.cos(psi)  # K = G / cos(psi)
+    return K * xp.cos(psi)  # K = G / cos(psi)
 
 
 def G_ellipsoidal_approx(psi, x):
@@ -169,11 +183,12 @@ def G_ellipsoidal_approx(psi, x):
     * area ratio term: Campbell (1990) eq. 14 :cite:`campbellDerivationAngleDensity1990`
     * exact formula: Campbell & Norman eq. 15.4 :cite:`campbell_introduction_2012`
     """
-    p1 = np.sqrt(x ** 2 + np.tan(psi) ** 2)
+    xp = array_namespace(psi)
+    p1 = xp.sqrt(x ** 2 + xp.tan(psi) ** 2)
     p2 = x + 1.774 * (x + 1.182) ** -0.733
     K = p1 / p2
 
-    return K * np.cos(psi)  # K = G / cos(psi)
+    return K * xp.cos(psi)  # K = G / cos(psi)
 
 
 def G_ellipsoidal_approx_bonan(psi, xl):
@@ -195,7 +210,7 @@ def G_ellipsoidal_approx_bonan(psi, xl):
     phi1 = 0.5 - 0.633 * chil - 0.330 * chil ** 2
     phi2 = 0.877 * (1 - 2 * phi1)
 
-    return phi1 + phi2 * np.cos(psi)
+    return phi1 + phi2 * array_namespace(psi).cos(psi)
 
 
 def x_to_mla_approx(x):
@@ -230,6 +245,8 @@ def mla_to_x_integ(mla):
     for the ellipsoidal leaf angle distribution
     by optimization.
     """
+    from scipy import optimize
+
     res = optimize.minimize_scalar(
         lambda x: np.abs(x_to_mla_integ(x) - mla),
         bounds=(0, 999),  # note arbitrary `x` upper bound (setting `None` doesn't work)
@@ -239,3 +256,92 @@ def mla_to_x_integ(mla):
         ),
     )
     return res.x
+
+
+# Declarative leaf angle distribution specs.
+# Unlike lambdas wrapping the `G_` functions, these can be pickled (e.g., for process pools),
+# and they are hashable and compare by value, so they can be used as cache keys.
+
+
+class LeafAngleDist(abc.ABC):
+    r"""Base class for leaf angle distribution specs.
+
+    Instances are callable, computing :math:`G(\psi)`,
+    so they can be used as the model parameter ``G_fn``.
+    """
+
+    def __call__(self, psi):
+        return self.G(psi)
+
+    @abc.abstractmethod
+    def G(self, psi):
+        r""":math:`G(\psi)`."""
+
+    def K_b(self, psi):
+        r""":math:`K_b(\psi) = G(\psi) / \cos(\psi)`."""
+        return self.G(psi) / array_namespace(psi).cos(psi)
+
+
+@dataclass(frozen=True)
+class Spherical(LeafAngleDist):
+    """Spherical leaf inclination angle distribution (:func:`G_spherical`)."""
+
+    def G(self, psi):
+        xp = array_namespace(psi)
+        res = xp.full_like(xp.asarray(psi, dtype=float), G_spherical(psi))
+        return float(res) if xp is np and res.ndim == 0 else res
+
+
+@dataclass(frozen=True)
+class Horizontal(LeafAngleDist):
+    """Horizontal leaves (:func:`G_horizontal`)."""
+
+    def G(self, psi):
+        return G_horizontal(psi)
+
+
+@dataclass(frozen=True)
+class Vertical(LeafAngleDist):
+    """Vertical leaves (:func:`G_vertical`)."""
+
+    def G(self, psi):
+        return G_vertical(psi)
+
+
+@dataclass(frozen=True)
+class Ellipsoidal(LeafAngleDist):
+    """Ellipsoidal leaf inclination angle distribution.
+
+    Parameters
+    ----------
+    x : float
+        b/a -- the ratio of ellipse horizontal semixaxis length to vertical
+        (``x=1`` gives spherical).
+    approx : bool
+        Use :func:`G_ellipsoidal_approx` instead of :func:`G_ellipsoidal`.
+    """
+
+    x: float
+    approx: bool = False
+
+    def G(self, psi):
+        if self.approx:
+            return G_ellipsoidal_approx(psi, self.x)
+        return G_ellipsoidal(psi, self.x)
+
+
+@dataclass(frozen=True)
+class Bonan(LeafAngleDist):
+    r"""Ross--Goudriaan leaf angle distribution as in :cite:t:`bonan_climate_2019`
+    (:func:`G_ellipsoidal_approx_bonan`).
+
+    Parameters
+    ----------
+    xl : float
+        :math:`\chi_l` (``xl=0`` gives spherical).
+    """
+
+    xl: float
+
+    def G(self, psi):
+        return G_ellipsoidal_approx_bonan(psi, self.xl)
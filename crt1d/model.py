@@ -9,17 +9,21 @@ Functions that operate on :class:`xr.Dataset` s
 created by :meth:`Model.to_xr` are in :mod:`.diagnostics`.
 """
 # from dataclasses import dataclass
+import functools
+import hashlib
 import warnings
 from collections import namedtuple
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
 import numpy as np
-import xarray as xr
 
-from .cases import load_default_case
+from .kernels import current as current_kernels
+from .kernels import use as use_kernels
+from .leaf_angle import LeafAngleDist
+from .solar import solar_zenith_angle
 from .solvers import AVAILABLE_SCHEMES
 from .solvers import RET_KEYS_ALL_SCHEMES  # the ones all schemes must return
+from .solvers.common import CanopyGeometry
 from .variables import VMD
 
 __all__ = ("Model", "run_sensitivity")
@@ -44,6 +48,12 @@ CANOPY_DESCRIPTION_KEYS = [
 # class for displaying canopy parameters/data (model paramters/inputs, not outputs)
 CanopyDescription = namedtuple("CanopyDescription", " ".join(k for k in CANOPY_DESCRIPTION_KEYS))
 
+# the solver factorization cache (`Model._solver_cache`) is cleared when any of these are updated
+_SOLVER_CACHE_KEYS = frozenset(["lai", "z", "clump", "G_fn", "leaf_t", "leaf_r", "soil_r"])
+
+# top-of-canopy boundary values, which all of the schemes are linear in
+_FORCING_KEYS = ("I_dr0_all", "I_df0_all")
+
 
 class Model:
     """A general class for testing 1-D canopy radiative transfer schemes."""
@@ -64,10 +74,17 @@ class Model:
 
     vmd = VMD
 
+    unit_responses_maxbytes = 32 * 2 ** 20
+    """Max total size (bytes) of the unit responses stored for ``run(superpose=True)``.
+    The oldest are dropped first, but the most recent are always kept."""
+
     def __init__(
         self,
         scheme="2s",
         nlayers=60,
+        *,
+        backend="numpy",
+        dtype=np.float64,
         **p_kwargs,
     ):
         """
@@ -81,16 +98,60 @@ class Model:
             Solar zenith angle (radians).
         nlayers : int
             Number of in-canopy layers to use in the solver (interface levels).
+        backend : {'numpy', 'jax'}
+            Array backend for running the scheme.
+            With ``'jax'`` (for the schemes that support it: ``'2s'``, ``'bf'``, ``'g77'``,
+            ``'bl'``), the solver is jit-compiled with `JAX <https://jax.readthedocs.io>`_
+            (enabling 64-bit floats in JAX) and compiled functions are reused
+            for runs with the same array shapes.
+            See :meth:`jax_solver` for a differentiable/vmappable version.
+        dtype : {numpy.float64, numpy.float32}
+            Floating point precision for running the scheme
+            (the spectral and LAI profile inputs are cast to it),
+            and of the outputs (:attr:`out`, :attr:`absorption`, :meth:`to_xr`).
+            Single precision halves the memory footprint of the outputs.
+            Typical maximum errors relative to double precision
+            (relative to the maximum value of each output),
+            for the default case:
+            ~ 1e-6 for most schemes
+            (including ``'n79'``, ``'zq'``, ``'zq_pa'``,
+            whose equation sets are solved in single precision);
+            ~ 1e-5 for ``'2s'`` and ``'4s'``
+            (``'4s'`` is solved in double precision and its outputs rounded).
         **p_kwargs
             Model parameter keyword arguments passed on to :meth:`update_p()`.
         """
         # load default case, for given nlayers
         self.nlayers = nlayers
-        self.p_default = load_default_case(nlayers=self.nlayers)
+        self.p_default = dict(_default_case(self.nlayers))
         """Default parameter settings dict."""
 
         # base initial settings on default
-        self._p = deepcopy(self.p_default)
+        # (the parameter arrays are read-only, so they can be shared instead of copied)
+        self._p = dict(self.p_default)
+
+        self._changed = set(Model.required_input_keys)
+        """Input keys updated since the last input check, whose derived parameters
+        need to be recomputed (see :meth:`_check_inputs`)."""
+
+        # canopy geometry precompute, (re)created when needed (see `geom`)
+        self._geom = None
+        self._geom_key = None
+
+        # factorizations of the psi-independent parts of the solver equation sets,
+        # cleared when the parameters they depend on change (see `update_p`)
+        self._solver_cache = {}
+
+        # solutions for unit direct and diffuse forcing, used in `run(superpose=True)`
+        self._unit_responses = {}
+
+        if backend not in ("numpy", "jax"):
+            raise ValueError(f"invalid `backend` {backend!r}. Valid options: 'numpy', 'jax'.")
+        self.backend = backend
+
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float64):
+            raise ValueError(f"invalid `dtype` {dtype!r}. Valid options: float32, float64.")
 
         # assign scheme
         self.assign_scheme(scheme)  # assigns scheme info dict to self.scheme
@@ -114,6 +175,10 @@ class Model:
         self.out_extra = {}
         """Scheme extra outputs, such as absorption. Only some schemes provide any."""
 
+        self.band_classes = None
+        """Summary of the optical-property band classes used in the last
+        ``run(optics_tol=...)``."""
+
     @property
     def p(self):
         """Model parameters are indended to be read only (updated with :meth:`update_p`).
@@ -133,7 +198,7 @@ class Model:
             pp.pprint(self._p)
 
     def copy_p(self):
-        """Return a copy of the parameters dict."""
+        """Return a copy of the parameters dict (with writeable copies of the arrays)."""
         return deepcopy(self._p)
 
     @property
@@ -142,6 +207,34 @@ class Model:
         p = self._p
         return CanopyDescription(**{k: v for k, v in p.items() if k in CANOPY_DESCRIPTION_KEYS})
 
+    @property
+    def geom(self):
+        """Quantities that depend only on the LAI profile and leaf angle distribution
+        (:class:`~crt1d.solvers.common.CanopyGeometry`).
+        Passed to the solvers that accept it, and reused across runs
+        until `lai`, `G_fn` or `clump` change.
+        """
+        p = self._p
+        key = (p["lai"].tobytes(), p["G_fn"], p["clump"])
+        if self._geom is None or key != self._geom_key:
+            self._geom = CanopyGeometry(p["lai"], p["G_fn"], p["clump"])
+            self._geom_key = key
+
+        return self._geom
+
+    def __deepcopy__(self, memo):
+        # The parameter arrays are read-only, so the copy can share them
+        for p in (self._p, self.p_default):
+            for v in p.values():
+                if isinstance(v, np.ndarray) and not v.flags.writeable:
+                    memo[id(v)] = v
+
+        m = Model.__new__(Model)
+        memo[id(self)] = m
+        m.__dict__.update(deepcopy(self.__dict__, memo))
+
+        return m
+
     def __repr__(self):
         scheme_name = self.scheme["name"]
         psi = self._p["psi"]
@@ -167,6 +260,11 @@ class Model:
             self.scheme = schemes["2s"]
             # also could self.terminate() or yield error or set flag
 
+        if self.backend not in self.scheme["backends"]:
+            raise ValueError(
+                f"scheme {self.scheme['name']!r} does not support the {self.backend!r} backend."
+            )
+
         return self  # for chaining
 
     def update_p(self, **kwargs):
@@ -179,27 +277,42 @@ class Model:
         """
         import traceback
 
-        p0 = deepcopy(self._p)
+        try:
+            self._update_p(kwargs)
+
+        except Exception:  # AssertionError or other failure in calculating new derived params
+            warnings.warn(
+                f"Updating parameters failed. "
+                f"Full traceback:\n\n{traceback.format_exc()}\n"
+                "Reverting."
+            )
+
+        return self  # for chaining
+
+    def _update_p(self, kwargs):
+        """Update parameters with dict `kwargs`, reverting and re-raising
+        if the validation fails."""
+        p0 = dict(self._p)  # parameter values are replaced, not modified, so no need to copy them
+        changed0 = set(self._changed)
         try:
             for k, v in kwargs.items():
                 if k not in Model.required_input_keys:
                     warnings.warn(f"{k!r} is not intended as an input and will be ignored")
                     continue
                 # else, it is intended to be an input, so try to use it
-                self._p[k] = v
+                self._p[k] = _read_only(v)
+                self._changed.add(k)
 
             # now update other parameters and validate
             self._check_inputs()  # checks self._p
 
-        except Exception:  # AssertionError or other failure in calculating new derived params
-            warnings.warn(
-                f"Updating parameters failed. "
-                f"Full traceback:\n\n{traceback.format_exc()}\n"
-                "Reverting."
-            )
+        except Exception:
             self._p = p0  # undo
+            self._changed = changed0
+            raise
 
-        return self  # for chaining
+        if not _SOLVER_CACHE_KEYS.isdisjoint(kwargs):
+            self._solver_cache.clear()
 
     def update_spectra(self, ds):
         """Update irradiance and leaf/soil optical property spectra
@@ -220,11 +333,21 @@ class Model:
 
     def _check_inputs(self):
         """
-        Check input LAI profile and compute additional vars from it...,
-        Check wls match optical props and toc spectra...
+        Check the inputs that have changed since the last check (:attr:`_changed`)
+        and recompute the derived parameters that depend on them:
+
+        * `lai`, `z`, `clump`: check the LAI profile and compute `dlai`, `zm`, `dz`, ...
+        * `psi`: `mu`
+        * `wl`, `dwl`, `wl_leafsoil`: check that the wavelengths of the optical properties
+          and the top-of-canopy spectra match, and compute the band edges `wle`
+        * `G_fn`, `psi`: `K_b_fn`, `G`, `K_b`
 
         update some class var (e.g. nlayers)
         """
+        changed = self._changed
+        if not changed:
+            return
+
         p = self._p
         # check for required input all at once variables
         for key in Model.required_input_keys:
@@ -232,69 +355,116 @@ class Model:
                 raise Exception(f"required key {key} is not present. Set it using `update_p`.")
 
         # lai profile
-        lai = p["lai"]
-        z = p["z"]
-        dz = np.diff(z)
-        zm = z[:-1] + 0.5 * dz  # midpts
-        assert (
-            z.size == lai.size
-        )  # z values go with lai (the cumulative LAI profile; interface levels)
-        self.nlev = lai.size
-        assert z[-1] > z[0]  # z increasing
-        assert lai[0] > lai[-1]  # LAI decreasing
-        assert lai[-1] == 0
-        p["lai_tot"] = lai[0]
-        p["lai_eff"] = lai * p["clump"]
-        dlai = lai[:-1] - lai[1:]
-        # assert dlai.sum() == lai[0]
-        p["dlai"] = dlai
-        p["dlai_eff"] = dlai * p["clump"]
-        p["zm"] = zm  # z for dlai, layer centers
-        p["dz"] = dz
-        assert dlai.size == zm.size and zm.size == dz.size
-
-        # solar zenith angle, giving precedence to psi if have both mu and psi already
-        psi = p["psi"]
-        try:
-            mu = p["mu"]
-            if mu != np.cos(psi):
-                warnings.warn(
-                    "Provided `mu` not consistent with provided `psi`. "
-                    "`mu` will be updated based on the value of `psi`."
-                )
-        except KeyError:  # no mu
-            p["mu"] = np.cos(psi)
+        if not changed.isdisjoint(("lai", "z", "clump")):
+            lai = p["lai"]
+            z = p["z"]
+            dz = np.diff(z)
+            zm = z[:-1] + 0.5 * dz  # midpts
+            assert (
+                z.size == lai.size
+            )  # z values go with lai (the cumulative LAI profile; interface levels)
+            self.nlev = lai.size
+            assert z[-1] > z[0]  # z increasing
+            assert lai[0] > lai[-1]  # LAI decreasing
+            assert lai[-1] == 0
+            p["lai_tot"] = lai[0]
+            p["lai_eff"] = lai * p["clump"]
+            dlai = lai[:-1] - lai[1:]
+            # assert dlai.sum() == lai[0]
+            p["dlai"] = dlai
+            p["dlai_eff"] = dlai * p["clump"]
+            p["zm"] = zm  # z for dlai, layer centers
+            p["dz"] = dz
+            assert dlai.size == zm.size and zm.size == dz.size
+
+        # solar zenith angle
+        if "psi" in changed:
+            p["mu"] = np.cos(p["psi"])
 
         # TODO: check mla and orient/x, similar to psi/mu
 
         # check the two wl sources
-        wl_toc = p["wl"]  # for the toc spectra
-        wl_op = p["wl_leafsoil"]  # for optical properties
-        assert wl_toc.size == wl_op.size
-        if not np.allclose(wl_toc, wl_op):
-            # print('wl for optical props and toc BC appear to be incompatible')
-            warnings.warn(
-                "Provided wavelengths for optical props (`wl_leafsoil`) and toc BC (`wl`) "
-                "appear to be incompatible:\n"
-                f"`wl - wl_leafsoil`:\n{wl_toc-wl_op}"
-            )
-            # or could convert, but which to choose as base?
-        self.nwl = wl_toc.size  # precedence to the toc spectra one as definition
+        if not changed.isdisjoint(("wl", "dwl", "wl_leafsoil")):
+            wl_toc = p["wl"]  # for the toc spectra
+            wl_op = p["wl_leafsoil"]  # for optical properties
+            assert wl_toc.size == wl_op.size
+            if not np.allclose(wl_toc, wl_op):
+                # print('wl for optical props and toc BC appear to be incompatible')
+                warnings.warn(
+                    "Provided wavelengths for optical props (`wl_leafsoil`) and toc BC (`wl`) "
+                    "appear to be incompatible:\n"
+                    f"`wl - wl_leafsoil`:\n{wl_toc-wl_op}"
+                )
+                # or could convert, but which to choose as base?
+            self.nwl = wl_toc.size  # precedence to the toc spectra one as definition
+
+            # compute wavelength band dges from centers and widths
+            assert p["wl"].size == p["dwl"].size
+            p["wle"] = np.r_[p["wl"][0] - 0.5 * p["dwl"][0], p["wl"] + 0.5 * p["dwl"]]
+
+        # K_b_fn from G_fn
+        if "G_fn" in changed:
+            G_fn = p["G_fn"]
+            if isinstance(G_fn, LeafAngleDist):
+                p["K_b_fn"] = G_fn.K_b  # picklable, unlike the lambda
+            else:
+                p["K_b_fn"] = lambda psi_: G_fn(psi_) / np.cos(psi_)
+        if not changed.isdisjoint(("G_fn", "psi")):
+            psi = p["psi"]
+            p["G"] = p["G_fn"](psi)
+            p["K_b"] = p["K_b_fn"](psi)
+            # ^ should clumping index be included somewhere here?
 
-        # compute wavelength band dges from centers and widths
-        assert p["wl"].size == p["dwl"].size
-        p["wle"] = np.r_[p["wl"][0] - 0.5 * p["dwl"][0], p["wl"] + 0.5 * p["dwl"]]
+        for k, v in p.items():
+            p[k] = _read_only(v)
 
-        # G_fn and K_b_fn ?
-        # p['G_fn'] = p['G_fn']
-        p["K_b_fn"] = lambda psi_: p["G_fn"](psi_) / np.cos(psi_)
-        p["G"] = p["G_fn"](psi)
-        p["K_b"] = p["K_b_fn"](psi)
-        # ^ should clumping index be included somewhere here?
+        changed.clear()
 
-    def run(self, **extra_solver_kwargs):
-        """
-        TODO: could add verbose option
+    def run(
+        self,
+        *,
+        superpose=False,
+        optics_tol=None,
+        n_threads=None,
+        kernels=None,
+        **extra_solver_kwargs,
+    ):
+        """Run the scheme and update the outputs.
+
+        Parameters
+        ----------
+        superpose : bool
+            Compute the solution as the superposition of the unit direct and unit diffuse
+            responses (the solutions for ``I_dr0_all = 1, I_df0_all = 0`` and vice versa),
+            scaled by the top-of-canopy irradiance in each band.
+            All of the schemes are linear in the top-of-canopy boundary values,
+            and the unit responses are stored and reused for subsequent runs
+            where only the irradiance spectra have changed
+            (e.g., after :meth:`update_spectra` with new sky conditions but the same
+            canopy, optical properties and `psi`).
+        optics_tol : float, optional
+            If provided, group the wavebands into classes with the same optical properties
+            (`leaf_r`, `leaf_t`, `soil_r`), to within `optics_tol`
+            (``0`` for exact duplicates only),
+            and solve for the unit responses once per class (implies `superpose`).
+            Bands with zero top-of-canopy irradiance are skipped
+            (profile outputs zero, band coefficient outputs NaN).
+            For ``optics_tol > 0``, the band in each class that deviates the most from the
+            class optics is also solved directly to estimate the error,
+            which is reported in :attr:`band_classes`.
+        n_threads : int, optional
+            Split the wavebands into `n_threads` chunks, solved concurrently
+            on a thread pool (:class:`concurrent.futures.ThreadPoolExecutor`).
+            The bands are independent in all of the schemes, and the NumPy/LAPACK kernels
+            doing most of the work release the GIL, so this speeds up runs
+            with many bands and layers (especially for the heavier schemes,
+            ``'zq'``, ``'zq_pa'``, ``'4s'``).
+        kernels : {'numpy', 'numba'}, optional
+            Implementation of the sequential loop kernels (:mod:`crt1d.kernels`)
+            to use for this run.
+            By default, the current setting (initially ``'numpy'``).
+        **extra_solver_kwargs
+            Passed on to the solver, e.g. scheme options.
         """
         # check wavelengths are compatible etc.
         # should already have been done at least once by now, but whatever
@@ -304,9 +474,22 @@ class Model:
         scheme = self.scheme
         p = self._p
         args = {k: p[k] for k in scheme["args"]}
+        if "geom" in scheme["options"]:
+            args["geom"] = self.geom
+        if "cache" in scheme["options"]:
+            args["cache"] = self._solver_cache
+        args.update({k: np.asarray(args[k], dtype=self.dtype) for k in _DTYPE_ARGS if k in args})
 
         # run
-        sol = scheme["solver"](**args, **extra_solver_kwargs)
+        with use_kernels(kernels or current_kernels()):
+            if optics_tol is not None:
+                sol = self._run_band_classes(args, extra_solver_kwargs, optics_tol, n_threads)
+            elif superpose:
+                sol_dr, sol_df = self._get_unit_responses(args, extra_solver_kwargs, n_threads)
+                sol = _superpose(sol_dr, sol_df, args["I_dr0_all"], args["I_df0_all"])
+            else:
+                sol = _solve(self._get_solver(), {**args, **extra_solver_kwargs}, n_threads)
+        sol = {k: _as_dtype(v, self.dtype) for k, v in sol.items()}
 
         # use the dict returned by the solver to update our state
         self.out.update({k: v for k, v in sol.items() if k in RET_KEYS_ALL_SCHEMES})
@@ -318,6 +501,277 @@ class Model:
 
         return self  # for chaining
 
+    def run_series(
+        self,
+        times,
+        lat,
+        lon,
+        forcing=None,
+        *,
+        psi_bin=None,
+        chunk_size=256,
+        **extra_solver_kwargs,
+    ):
+        """Run for a time series of solar positions and top-of-canopy irradiance spectra.
+
+        Solar zenith angles are computed for all `times` at once
+        (:func:`~crt1d.solar.solar_zenith_angle`) and steps with the sun at or below
+        the horizon are not solved (their outputs are zero).
+        For schemes that support a batch of columns (``batched``), the day steps are solved
+        `chunk_size` at a time in one solver call.
+        For the others, steps with the same solar zenith angle share one pair of unit
+        direct/diffuse responses (see :meth:`run` with ``superpose=True``).
+        The model state (parameters and :attr:`out`) is not modified.
+
+        Parameters
+        ----------
+        times : array_like
+            UTC times (see :func:`~crt1d.solar.solar_zenith_angle`).
+        lat, lon : float
+            Location (degrees).
+        forcing : dict-like, optional
+            Top-of-canopy irradiance spectra ``I_dr0_all`` and/or ``I_df0_all`` for each time,
+            shape ``(ntime, nwl)``.
+            Those not provided are taken from the current parameters for all times.
+        psi_bin : float, optional
+            Round the solar zenith angles to multiples of `psi_bin` (radians),
+            so that more steps can share unit responses.
+        chunk_size : int
+            Number of steps per solver call for batched schemes.
+        **extra_solver_kwargs
+            Passed on to the solver, e.g. scheme options.
+
+        Returns
+        -------
+        xarray.Dataset
+            Standard outputs with leading ``time`` dimension.
+        """
+        import xarray as xr
+
+        import crt1d
+
+        self._check_inputs()
+        scheme = self.scheme
+        solver = self._get_solver()
+        p = self._p
+
+        times = np.asarray(times, dtype="datetime64[ns]")
+        nt = times.size
+        nwl = p["wl"].size
+        forcing = {} if forcing is None else forcing
+        if any(k not in _FORCING_KEYS for k in forcing):
+            raise ValueError(f"`forcing` may only include {', '.join(_FORCING_KEYS)}.")
+        I0 = {
+            k: np.broadcast_to(np.asarray(forcing.get(k, p[k]), dtype=self.dtype), (nt, nwl))
+            for k in _FORCING_KEYS
+        }
+
+        psi = solar_zenith_angle(times, lat, lon)
+        iday = np.flatnonzero(psi < np.pi / 2)
+        if psi_bin is not None:
+            psi_b = np.round(psi[iday] / psi_bin) * psi_bin
+            psi[iday] = np.where(
+                psi_b < np.pi / 2, psi_b, psi_b - psi_bin
+            )  # keep sun above horizon
+
+        args = {k: p[k] for k in scheme["args"]}
+        if "geom" in scheme["options"]:
+            args["geom"] = self.geom
+        if "cache" in scheme["options"]:
+            args["cache"] = self._solver_cache
+        args.update({k: np.asarray(args[k], dtype=self.dtype) for k in _DTYPE_ARGS if k in args})
+
+        out = {k: np.zeros((nt, self.nlev, nwl), dtype=self.dtype) for k in RET_KEYS_ALL_SCHEMES}
+
+        if scheme["batched"]:
+            # steps as a batch dimension between levels and bands: profiles (nz, nstep, nwl)
+            args["lai"] = p["lai"][:, np.newaxis, np.newaxis]
+            for i0 in range(0, iday.size, chunk_size):
+                ic = iday[i0 : i0 + chunk_size]
+                args.update({k: I0[k][ic] for k in _FORCING_KEYS}, psi=psi[ic, np.newaxis])
+                sol = solver(**args, **extra_solver_kwargs)
+                for k in RET_KEYS_ALL_SCHEMES:
+                    out[k][ic] = np.moveaxis(sol[k], 0, 1)
+        else:
+            psi_u, inv = np.unique(psi[iday], return_inverse=True)
+            for j, psi_j in enumerate(psi_u):
+                ij = iday[inv == j]
+                args["psi"] = psi_j
+                if ij.size == 1:
+                    args.update({k: I0[k][ij[0]] for k in _FORCING_KEYS})
+                    sol = solver(**args, **extra_solver_kwargs)
+                    for k in RET_KEYS_ALL_SCHEMES:
+                        out[k][ij[0]] = sol[k]
+                else:
+                    sol_dr, sol_df = self._get_unit_responses(args, extra_solver_kwargs)
+                    I_dr0 = I0["I_dr0_all"][ij, np.newaxis, :]
+                    I_df0 = I0["I_df0_all"][ij, np.newaxis, :]
+                    for k in RET_KEYS_ALL_SCHEMES:
+                        out[k][ij] = I_dr0 * sol_dr[k] + I_df0 * sol_df[k]
+
+        def tup(name, data):
+            return self.vmd[name].dv_tuple(data)
+
+        def tup_time(name, data):
+            dims, _, attrs = self.vmd[name].dv_tuple(data)
+            return (("time", *dims), data, attrs)
+
+        return xr.Dataset(
+            coords={
+                "time": ("time", times, {"long_name": "Time (UTC)"}),
+                "z": tup("z", p["z"]),
+                "wl": tup("wl", p["wl"]),
+                "zm": tup("zm", p["zm"]),
+                "wle": tup("wle", p["wle"]),
+            },
+            data_vars={
+                **{k: tup_time(k, out[k]) for k in RET_KEYS_ALL_SCHEMES},
+                "I_d": tup_time("I_d", out["I_dr"] + out["I_df_d"]),
+                "dwl": tup("dwl", p["dwl"]),
+                "lai": tup("lai", p["lai"]),
+                "dlai": tup("dlai", p["dlai"]),
+                "psi": tup_time("psi", psi),
+                "sza": tup_time("sza", np.rad2deg(psi)),
+            },
+            attrs={
+                "lat": lat,
+                "lon": lon,
+                "scheme_name": scheme["name"],
+                "scheme_long_name": scheme["long_name"],
+                "scheme_short_name": scheme["short_name"],
+                "crt1d_version": crt1d.__version__,
+            },
+        )
+
+    def _get_solver(self):
+        """Scheme solver function for the backend, taking and returning NumPy arrays."""
+        if self.backend == "numpy":
+            return self.scheme["solver"]
+
+        from .solvers._jax import JAX_ARGS
+
+        def solver(**kwargs):
+            options = {k: v for k, v in kwargs.items() if k in self.scheme["options"]}
+            f = self.jax_solver(**options)
+            sol = f(**{k: kwargs[k] for k in JAX_ARGS if k in kwargs})
+            return {k: np.asarray(v) for k, v in sol.items()}
+
+        return solver
+
+    def jax_solver(self, **options):
+        r"""The jit-compiled (JAX) solver for the current scheme,
+        as a function of the array inputs (keyword arguments)
+        ``psi``, ``I_dr0_all``, ``I_df0_all``, ``lai``, ``leaf_t``, ``leaf_r``, ``soil_r``
+        (those that the scheme uses), returning the outputs dict.
+
+        The function can be differentiated (e.g., :func:`jax.grad`, :func:`jax.jacfwd`)
+        with respect to these inputs and vectorized with :func:`jax.vmap`
+        (e.g., over columns or times).
+        The other solver arguments (leaf angle distribution, mean leaf angle)
+        are fixed at their current values.
+
+        Parameters
+        ----------
+        **options
+            Scheme options.
+        """
+        from .solvers._jax import jit_solver
+        from .solvers._jax import JAX_ARGS
+
+        p = self._p
+        static = {k: p[k] for k in self.scheme["args"] if k not in JAX_ARGS + ("K_b_fn", "G_fn")}
+        static.update((k, v) for k, v in options.items() if k != "geom")
+
+        return jit_solver(self.scheme["name"], p["G_fn"], tuple(sorted(static.items())))
+
+    def _get_unit_responses(self, args, extra_solver_kwargs, n_threads=None):
+        """Solutions for unit direct and unit diffuse top-of-canopy forcing in all bands,
+        computed on first use and stored for the current inputs (other than the forcing).
+        """
+        p = self._p
+        key = (
+            self.scheme["name"],
+            p["G_fn"],  # `K_b_fn` is recreated from it on every input check
+            tuple(
+                (k, _hashable(v))
+                for k, v in args.items()
+                if k not in _FORCING_KEYS + ("K_b_fn", "geom", "cache")
+            ),
+            tuple((k, _hashable(v)) for k, v in sorted(extra_solver_kwargs.items())),
+        )
+        try:
+            return self._unit_responses[key][:2]
+        except KeyError:
+            pass
+
+        solver = self._get_solver()
+        nwl = args["I_dr0_all"].size
+        one, zero = np.ones(nwl, dtype=self.dtype), np.zeros(nwl, dtype=self.dtype)
+        kwargs = {**args, **extra_solver_kwargs}
+        sol_dr = _solve(solver, {**kwargs, "I_dr0_all": one, "I_df0_all": zero}, n_threads)
+        sol_df = _solve(solver, {**kwargs, "I_dr0_all": zero, "I_df0_all": one}, n_threads)
+
+        nbytes = _sol_nbytes(sol_dr) + _sol_nbytes(sol_df)
+        cached = self._unit_responses
+        total = sum(n for _, _, n in cached.values())
+        while cached and total + nbytes > self.unit_responses_maxbytes:
+            total -= cached.pop(next(iter(cached)))[2]  # oldest
+        cached[key] = sol_dr, sol_df, nbytes
+
+        return sol_dr, sol_df
+
+    def _run_band_classes(self, args, extra_solver_kwargs, optics_tol, n_threads=None):
+        """Solve once per optical-property class of the bands with nonzero irradiance
+        and scatter the results back to all bands."""
+        solver = self._get_solver()
+        I_dr0, I_df0 = args["I_dr0_all"], args["I_df0_all"]
+        nwl = I_dr0.size
+        optics_keys = [k for k in ("leaf_r", "leaf_t", "soil_r") if k in args]
+
+        lit = (I_dr0 != 0) | (I_df0 != 0)
+        optics = np.column_stack([args[k][lit] for k in optics_keys])
+        class_optics, inv = _cluster_optics(optics, optics_tol)
+        dev = np.abs(optics - class_optics[inv]).max(axis=1)
+
+        # unit responses for the classes
+        args_c = {**args, **dict(zip(optics_keys, class_optics.T))}
+        args_c.update(I_dr0_all=np.zeros(len(class_optics)), I_df0_all=np.zeros(len(class_optics)))
+        sol_dr, sol_df = self._get_unit_responses(args_c, extra_solver_kwargs, n_threads)
+        sol_lit = _superpose(sol_dr, sol_df, I_dr0[lit], I_df0[lit], inv=inv)
+
+        sol = {}
+        for k, v_lit in sol_lit.items():
+            if np.ndim(v_lit) == 2:
+                v = np.zeros((v_lit.shape[0], nwl), dtype=v_lit.dtype)
+            else:
+                v = np.full(nwl, np.nan, dtype=v_lit.dtype)
+            v[..., lit] = v_lit
+            sol[k] = v
+
+        # error estimate, using the band that deviates the most from its class in each class
+        err = 0.0
+        if optics_tol > 0 and inv.size > 0:
+            isort = np.lexsort((dev, inv))
+            iworst = isort[np.r_[inv[isort][1:] != inv[isort][:-1], True]]
+            args_w = {**args, **dict(zip(optics_keys, optics[iworst].T))}
+            args_w.update(I_dr0_all=I_dr0[lit][iworst], I_df0_all=I_df0[lit][iworst])
+            sol_w = solver(**{**args_w, **extra_solver_kwargs})
+            for k in RET_KEYS_ALL_SCHEMES:
+                exact = sol_w[k]
+                scale = np.abs(exact).max()
+                if scale > 0:
+                    err = max(err, np.abs(sol_lit[k][:, iworst] - exact).max() / scale)
+
+        self.band_classes = {
+            "n_bands": nwl,
+            "n_bands_lit": int(lit.sum()),
+            "n_classes": len(class_optics),
+            "optics_max_dev": float(dev.max()) if dev.size else 0.0,
+            "rel_err_est": float(err),
+        }
+
+        return sol
+
     @property
     def out_all(self):
         """Standard and extra outputs."""
@@ -343,6 +797,8 @@ class Model:
             Extra information about the run/model to be stored in the dataset.
         """
         # import datetime
+        import xarray as xr
+
         import crt1d
 
         if self._run_count == 0:
@@ -458,6 +914,133 @@ class Model:
         _plot_leafsoil_spectra(self)
 
 
+def _hashable(v):
+    """Hashable representation of a parameter value, based on content (digest) for arrays."""
+    if isinstance(v, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(v), digest_size=16).digest()
+        return (v.shape, v.dtype.str, digest)
+    return v
+
+
+def _sol_nbytes(sol):
+    """Total size (bytes) of the arrays in solver output dict `sol`."""
+    return sum(v.nbytes for v in sol.values() if isinstance(v, np.ndarray))
+
+
+@functools.lru_cache(maxsize=8)
+def _default_case(nlayers):
+    """:func:`~crt1d.cases.load_default_case` with read-only arrays, loaded once per `nlayers`
+    and shared by the models. Not to be modified."""
+    from .cases import load_default_case
+
+    return {k: _read_only(v) for k, v in load_default_case(nlayers=nlayers).items()}
+
+
+def _read_only(v):
+    """Read-only view of `v` if it is a writeable array, else `v`."""
+    if isinstance(v, np.ndarray) and v.flags.writeable:
+        v = v.view()
+        v.flags.writeable = False
+    return v
+
+
+_DTYPE_ARGS = ("I_dr0_all", "I_df0_all", "lai", "leaf_t", "leaf_r", "soil_r")
+# ^ solver args cast to the model `dtype`
+
+
+def _as_dtype(x, dtype):
+    """Cast floating-point array (or scalar) `x` to `dtype` (no copy if it already is)."""
+    if np.issubdtype(np.result_type(x), np.floating):
+        return np.asarray(x).astype(dtype, copy=False)
+    return x
+
+
+_BAND_ARGS = ("I_dr0_all", "I_df0_all", "leaf_t", "leaf_r", "soil_r")
+# ^ solver args with a band dimension (the last one)
+
+
+def _solve(solver, kwargs, n_threads=None):
+    """Call `solver` with `kwargs`, with the bands split into `n_threads` chunks
+    solved on a thread pool if `n_threads` > 1."""
+    if n_threads is None or n_threads <= 1:
+        return solver(**kwargs)
+
+    from concurrent.futures import ThreadPoolExecutor
+    import contextvars
+
+    nwl = np.shape(kwargs["I_dr0_all"])[-1]
+    edges = np.linspace(0, nwl, min(n_threads, nwl) + 1).astype(int)
+    chunks = [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+    band_args = [k for k in _BAND_ARGS if k in kwargs]
+
+    def solve_chunk(s):
+        return solver(**{**kwargs, **{k: kwargs[k][..., s] for k in band_args}})
+
+    with ThreadPoolExecutor(len(chunks)) as executor:
+        # each chunk runs in a copy of the current context,
+        # so that the workers use the kernels selected for this run (`kernels.use`)
+        futures = [executor.submit(contextvars.copy_context().run, solve_chunk, s) for s in chunks]
+
+        # Outputs with the band dimension are assembled in preallocated arrays,
+        # others (not band-dependent) are taken from the first chunk
+        sol = {}
+        for s, future in zip(chunks, futures):
+            for k, v in future.result().items():
+                if np.ndim(v) >= 1 and np.shape(v)[-1] == s.stop - s.start:
+                    if k not in sol:
+                        sol[k] = np.empty(np.shape(v)[:-1] + (nwl,), dtype=np.result_type(v))
+                    sol[k][..., s] = v
+                else:
+                    sol.setdefault(k, v)
+
+    return sol
+
+
+def _superpose(sol_dr, sol_df, I_dr0, I_df0, *, inv=None):
+    """Combine unit direct and diffuse responses, scaled by the top-of-canopy irradiance.
+    `inv` optionally maps the bands of `I_dr0`/`I_df0` to the bands (classes) of the responses.
+    """
+    sol = {}
+    for k, v_dr in sol_dr.items():
+        v_df = sol_df[k]
+        if inv is not None:
+            v_dr, v_df = v_dr[..., inv], v_df[..., inv]
+        if np.ndim(v_dr) == 2:  # (level, band) profile
+            sol[k] = I_dr0 * v_dr + I_df0 * v_df
+        else:  # band coefficient that does not depend on the forcing (e.g. bf `rho_c`)
+            sol[k] = v_dr
+
+    return sol
+
+
+def _cluster_optics(optics, tol):
+    """Group the rows of `optics` (band, property) into classes.
+
+    With `tol` 0, only identical rows are grouped. Otherwise, rows are grouped by
+    rounding to a grid with spacing `tol`, so that members of a class are within `tol`
+    of the class mean in each property.
+
+    Returns
+    -------
+    class_optics : array
+        Mean optics of each class (class, property).
+    inv : array
+        Class index of each band.
+    """
+    if tol == 0:
+        class_optics, inv = np.unique(optics, axis=0, return_inverse=True)
+        return class_optics, inv.ravel()
+
+    _, inv = np.unique(np.round(optics / tol), axis=0, return_inverse=True)
+    inv = inv.ravel()
+    counts = np.bincount(inv)
+    class_optics = np.column_stack(
+        [np.bincount(inv, weights=col) / counts for col in optics.T]
+    ).reshape(-1, optics.shape[1])
+
+    return class_optics, inv
+
+
 def _plot_canopy(m):
     """Plot LAI and LAD profiles.
 
@@ -465,6 +1048,8 @@ def _plot_canopy(m):
 
     `m` must be :class:`Model`
     """
+    import matplotlib.pyplot as plt
+
     p = m._p
     lai = p["lai"]
     z = p["z"]
@@ -512,6 +1097,8 @@ def _plot_canopy(m):
 
 def _plot_toc_spectra(m):
     """Plot the toc irradiance spectra."""
+    import matplotlib.pyplot as plt
+
     p = m._p
     dwl = p["dwl"]
     wl = p["wl"]
@@ -535,6 +1122,8 @@ def _plot_toc_spectra(m):
 
 def _plot_leafsoil_spectra(m):
     """Plot the spectral leaf and soil properties."""
+    import matplotlib.pyplot as plt
+
     p = m._p
     wl = p["wl_leafsoil"]
     rl = p["leaf_r"]
@@ -574,12 +1163,11 @@ def _calc_absorption(m):
     p = m._p
     out = m.out
 
-    lai = p["lai"]
-    dlai = p["dlai"]
+    lai, dlai, leaf_r, leaf_t = (
+        np.asarray(p[k], dtype=m.dtype) for k in ("lai", "dlai", "leaf_r", "leaf_t")
+    )
     K_b = p["K_b"]  # G/cos(psi)
 
-    leaf_r = p["leaf_r"]
-    leaf_t = p["leaf_t"]
     leaf_a = 1 - (leaf_r + leaf_t)  # leaf element absorption coeff
 
     I_dr = out["I_dr"]
@@ -633,7 +1221,7 @@ def _calc_absorption(m):
     a_sh = a_df_sh
     assert np.allclose(a_sl + a_sh, a)  # sanity check
 
-    return {
+    absorption = {
         "aI": a,
         "aI_df": a_df,
         "aI_dr": a_dr,
@@ -645,19 +1233,234 @@ def _calc_absorption(m):
         "f_slm": f_sl,
     }
 
+    return {k: _as_dtype(v, m.dtype) for k, v in absorption.items()}
+
+
+# state of a run_sensitivity worker process (set by `_sweep_init`)
+_sweep_state = {}
 
-def run_sensitivity(m0, p_sets):
-    """For model m, run multiple cases.
-    Vary one or more attributes and create combined dataset.
 
-    m0 : model object
-        base case to branch off of
+def _sweep_init(m0, p_sets, run_kwargs, spec=None):
+    m = deepcopy(m0)
+    if spec is not None:
+        # Fill in the arrays left out of `m0` and `p_sets` by `_sweep_share`
+        # with views of the shared memory block
+        from .shared import attach
+
+        arrays = attach(spec)
+        p_sets = dict(p_sets)
+        for k, a in arrays.items():
+            where, k = k.split("/")
+            if where == "p_sets":
+                p_sets[k] = list(a)
+            elif where == "p_default":
+                m.p_default[k] = a
+            else:
+                m._p[k] = a
+                m._changed.add(k)
+        m._check_inputs()
+    _sweep_state.update(m=m, p_sets=p_sets, run_kwargs=run_kwargs)
+
+
+def _sweep_share(m0, p_sets):
+    """Move the array inputs of `m0` (current and default), and the `p_sets` values
+    that are same-shape arrays, to a :class:`~crt1d.shared.SharedArrays`.
+    Returns the shared arrays and light versions of `m0` and `p_sets` (without them)."""
+    from copy import copy
+
+    from .shared import SharedArrays
+
+    def is_input_array(k, v):
+        return k in Model.required_input_keys and isinstance(v, np.ndarray)
+
+    arrays = {}
+    for where, p in [("p", m0._p), ("p_default", m0.p_default)]:
+        arrays.update({f"{where}/{k}": v for k, v in p.items() if is_input_array(k, v)})
+    p_sets_light = {}
+    for k, vs in p_sets.items():
+        if all(isinstance(v, np.ndarray) and v.shape == np.shape(vs[0]) for v in vs):
+            arrays[f"p_sets/{k}"] = np.stack(vs)
+            p_sets_light[k] = [None] * len(vs)  # only the length is used
+        else:
+            p_sets_light[k] = vs
+
+    m = copy(m0)
+    m._p = {k: v for k, v in m0._p.items() if not is_input_array(k, v)}
+    m.p_default = {k: v for k, v in m0.p_default.items() if not is_input_array(k, v)}
+    m.out = {}
+    m._solver_cache = {}
+    m._unit_responses = {}
+    m._geom = None
+
+    return SharedArrays(arrays), m, p_sets_light
+
+
+def _sweep_run(case_inds):
+    """Run the cases with flat indices `case_inds` of the sweep, returning the stacked
+    standard outputs."""
+    m = _sweep_state["m"]
+    p_sets = _sweep_state["p_sets"]
+    shape = tuple(len(v) for v in p_sets.values())
+
+    res = {k: [] for k in RET_KEYS_ALL_SCHEMES}
+    for i in case_inds:
+        case = {k: p_sets[k][j] for k, j in zip(p_sets, np.unravel_index(i, shape))}
+        scheme = case.pop("scheme", None)
+        if scheme is not None:
+            m.assign_scheme(scheme)
+        try:
+            m._update_p(case)
+        except Exception as e:
+            # record NaN outputs for the case instead of those of the previous one
+            warnings.warn(f"Sweep case {i} ({case}) failed validation ({e!r}). Outputs set to NaN.")
+            for k in RET_KEYS_ALL_SCHEMES:
+                res[k].append(np.full((m.nlev, m.nwl), np.nan, dtype=m.dtype))
+            continue
+        m.run(**_sweep_state["run_kwargs"])
+        for k in RET_KEYS_ALL_SCHEMES:
+            res[k].append(m.out[k])
+
+    return case_inds, {k: np.stack(v) for k, v in res.items()}
+
+
+def run_sensitivity(
+    m0,
+    p_sets,
+    *,
+    max_workers=None,
+    chunksize=None,
+    mp_context=None,
+    shared_memory=False,
+    **run_kwargs,
+):
+    """For model `m0`, run the cases of the Cartesian product of parameter values
+    (in parallel) and create combined dataset.
+
+    Parameters
+    ----------
+    m0 : Model
+        Base case to branch off of (not modified).
     p_sets : dict
-        keys: param to change; values: list of values for the param
+        Keys: param to change (a :meth:`Model.update_p` param, or ``'scheme'``);
+        values: list of values for the param.
+    max_workers : int, optional
+        Number of worker processes (:class:`concurrent.futures.ProcessPoolExecutor`).
+        With ``1``, the cases are run in this process instead.
+    chunksize : int, optional
+        Number of cases sent to a worker at a time.
+        By default, the cases are split into ~ 4 chunks per worker.
+    mp_context : str or multiprocessing context, optional
+        Start method (``'fork'``, ``'spawn'``, ``'forkserver'``) or context
+        used to create the worker processes.
+        By default, ``'fork'`` where available (the workers then inherit `m0`,
+        so it doesn't need to be picklable), otherwise the platform default.
+    shared_memory : bool
+        Publish the array inputs of `m0` (spectra, LAI profile, ...)
+        and the array values in `p_sets` once in shared memory (:mod:`crt1d.shared`),
+        which the workers use read-only, instead of each worker receiving its own
+        pickled copy. This reduces memory use and start-up time for large spectra
+        or many workers with the ``'spawn'`` and ``'forkserver'`` start methods.
+        Ignored with ``'fork'``, since forked workers already share the parent's
+        memory (copy-on-write), and with ``max_workers=1``.
+    **run_kwargs
+        Passed on to :meth:`Model.run`.
 
     Returns
     -------
     xr.Dataset
-        With a new dimension for each key in `p_sets`
+        Standard outputs, with a new dimension for each key in `p_sets`.
+        Coordinate values are the param values if they are scalars, otherwise their index.
     """
-    raise NotImplementedError
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing as mp
+
+    p_sets = {k: list(v) for k, v in p_sets.items()}
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    chunks = _sweep_chunks(p_sets, 4 * max_workers, chunksize)
+
+    if max_workers == 1:
+        _sweep_init(m0, p_sets, run_kwargs)
+        try:
+            results = [_sweep_run(c) for c in chunks]
+        finally:
+            _sweep_state.clear()
+    else:
+        # With fork, the workers inherit `m0`, so it doesn't need to be picklable
+        # (a user-provided leaf angle distribution function `G_fn` may be a lambda)
+        if mp_context is None:
+            mp_context = "fork" if "fork" in mp.get_all_start_methods() else None
+        ctx = mp_context if hasattr(mp_context, "Process") else mp.get_context(mp_context)
+        if shared_memory and ctx.get_start_method() != "fork":
+            shared, m0_, p_sets_ = _sweep_share(m0, p_sets)
+            initargs = (m0_, p_sets_, run_kwargs, shared.spec)
+        else:
+            shared = None
+            initargs = (m0, p_sets, run_kwargs)
+        try:
+            with ProcessPoolExecutor(
+                max_workers, mp_context=ctx, initializer=_sweep_init, initargs=initargs
+            ) as executor:
+                results = list(executor.map(_sweep_run, chunks))
+        finally:
+            if shared is not None:
+                shared.close()
+
+    return _sweep_dataset(m0, p_sets, results)
+
+
+def _sweep_chunks(p_sets, n_tasks, chunksize=None):
+    """Split the flat case indices of the sweep into chunks (ranges)."""
+    n = int(np.prod([len(v) for v in p_sets.values()]))
+    if chunksize is None:
+        chunksize = max(1, -(-n // n_tasks))
+    return [range(i, min(i + chunksize, n)) for i in range(0, n, chunksize)]
+
+
+def _sweep_dataset(m0, p_sets, results):
+    """Combine the sweep results (``(case_inds, outputs)`` from :func:`_sweep_run`)
+    into a dataset with a dim for each param."""
+    import xarray as xr
+
+    shape = tuple(len(v) for v in p_sets.values())
+    n = int(np.prod(shape))
+    nz, nwl = m0.nlev, m0.nwl
+    out = {k: np.empty((n, nz, nwl), dtype=m0.dtype) for k in RET_KEYS_ALL_SCHEMES}
+    for inds, res in results:
+        for k in RET_KEYS_ALL_SCHEMES:
+            out[k][inds.start : inds.stop] = res[k]
+
+    p = m0._p
+    vmd = m0.vmd
+    dims = tuple(p_sets)
+
+    def tup(name, data):
+        return vmd[name].dv_tuple(data)
+
+    def tup_sweep(name, data):
+        dims_, _, attrs = vmd[name].dv_tuple(data)
+        return ((*dims, *dims_), data.reshape(shape + data.shape[1:]), attrs)
+
+    coords = {}
+    for k, v in p_sets.items():
+        if all(np.isscalar(x) for x in v):
+            attrs = vmd[k].da_attrs() if k in vmd.variables else {}
+            coords[k] = (k, v, attrs)
+        else:
+            coords[k] = (k, np.arange(len(v)), {"long_name": f"Index of `{k}` value"})
+
+    return xr.Dataset(
+        coords={
+            **coords,
+            "z": tup("z", p["z"]),
+            "wl": tup("wl", p["wl"]),
+            "zm": tup("zm", p["zm"]),
+            "wle": tup("wle", p["wle"]),
+        },
+        data_vars={
+            **{k: tup_sweep(k, out[k]) for k in RET_KEYS_ALL_SCHEMES},
+            "I_d": tup_sweep("I_d", out["I_dr"] + out["I_df_d"]),
+            "dwl": tup("dwl", p["dwl"]),
+        },
+    )
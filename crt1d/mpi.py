@@ -0,0 +1,177 @@
+"""
+MPI-distributed runners for sweeps and grids spanning several nodes
+(requires :mod:`mpi4py`).
+
+All ranks call the runner with the same inputs (SPMD style), e.g. with ``mpirun -n 4``,
+and the results are gathered to rank 0. Two load-balancing strategies are available:
+
+* ``'static'`` -- chunks of cases/columns are assigned to the ranks round-robin up front.
+  No communication until the gather, good when the cost per chunk is uniform.
+* ``'dynamic'`` -- rank 0 hands out chunks to the other ranks as they finish their previous one.
+  Good when the cost varies (e.g., sweeps over schemes or layer counts, ``4s`` vs ``bl``).
+"""
+import numpy as np
+
+from .model import _sweep_chunks
+from .model import _sweep_dataset
+from .model import _sweep_init
+from .model import _sweep_run
+from .model import _sweep_state
+
+__all__ = ("run_columns_mpi", "run_sensitivity_mpi")
+
+
+_TAG_WORK = 1
+_TAG_STOP = 2
+
+
+def _get_comm(comm):
+    if comm is None:
+        from mpi4py import MPI
+
+        comm = MPI.COMM_WORLD
+    return comm
+
+
+def _map(comm, fn, n_tasks, balance):
+    """Compute ``fn(i)`` for ``i in range(n_tasks)`` across the ranks of `comm`.
+    Return the list of results on rank 0 and None on the others."""
+    from mpi4py import MPI
+
+    rank, size = comm.Get_rank(), comm.Get_size()
+    if size == 1:
+        return [fn(i) for i in range(n_tasks)]
+
+    if balance == "static":
+        local = [(i, fn(i)) for i in range(rank, n_tasks, size)]
+        gathered = comm.gather(local, root=0)
+        if rank != 0:
+            return None
+        res = [None] * n_tasks
+        for part in gathered:
+            for i, r in part:
+                res[i] = r
+        return res
+
+    elif balance == "dynamic":
+        status = MPI.Status()
+        if rank == 0:
+            res = [None] * n_tasks
+            i_next = 0
+            n_workers = size - 1
+            while n_workers > 0:
+                # a worker is ready, returning the result of its previous task (if any)
+                msg = comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
+                if msg is not None:
+                    i, r = msg
+                    res[i] = r
+                worker = status.Get_source()
+                if i_next < n_tasks:
+                    comm.send(i_next, dest=worker, tag=_TAG_WORK)
+                    i_next += 1
+                else:
+                    comm.send(None, dest=worker, tag=_TAG_STOP)
+                    n_workers -= 1
+            return res
+        else:
+            msg = None
+            while True:
+                comm.send(msg, dest=0)
+                i = comm.recv(source=0, tag=MPI.ANY_TAG, status=status)
+                if status.Get_tag() == _TAG_STOP:
+                    return None
+                msg = (i, fn(i))
+
+    else:
+        raise ValueError("`balance` should be 'static' or 'dynamic'.")
+
+
+def run_sensitivity_mpi(m0, p_sets, *, comm=None, balance="dynamic", chunksize=None, **run_kwargs):
+    """Like :func:`crt1d.model.run_sensitivity`, but with the cases distributed across MPI ranks.
+
+    Parameters
+    ----------
+    m0 : Model
+        Base case (the same on all ranks).
+    p_sets : dict
+        Keys: param to change; values: list of values for the param.
+    comm : mpi4py.MPI.Comm, optional
+        Default: ``MPI.COMM_WORLD``.
+    balance : {'dynamic', 'static'}
+        Load balancing strategy.
+    chunksize : int, optional
+        Number of cases per task. By default, ~ 4 tasks per rank.
+    **run_kwargs
+        Passed on to :meth:`Model.run`.
+
+    Returns
+    -------
+    xr.Dataset or None
+        The combined dataset on rank 0, None on the other ranks.
+    """
+    comm = _get_comm(comm)
+    p_sets = {k: list(v) for k, v in p_sets.items()}
+    chunks = _sweep_chunks(p_sets, 4 * comm.Get_size(), chunksize)
+
+    _sweep_init(m0, p_sets, run_kwargs)
+    try:
+        results = _map(comm, lambda i: _sweep_run(chunks[i]), len(chunks), balance)
+    finally:
+        _sweep_state.clear()
+    if results is None:
+        return None
+
+    return _sweep_dataset(m0, p_sets, results)
+
+
+def run_columns_mpi(b, *, comm=None, balance="static", chunksize=None, **run_kwargs):
+    """Run :class:`~crt1d.ColumnBatch` `b` with the columns distributed across MPI ranks.
+
+    Parameters
+    ----------
+    b : ColumnBatch
+        With the same inputs on all ranks.
+    comm : mpi4py.MPI.Comm, optional
+        Default: ``MPI.COMM_WORLD``.
+    balance : {'static', 'dynamic'}
+        Load balancing strategy.
+    chunksize : int, optional
+        Number of columns per task. By default, ~ 4 tasks per rank.
+    **run_kwargs
+        Passed on to :meth:`ColumnBatch.run`.
+
+    Returns
+    -------
+    ColumnBatch or None
+        `b`, with outputs for all columns, on rank 0. None on the other ranks.
+    """
+    comm = _get_comm(comm)
+    n = b.ncol
+    if chunksize is None:
+        chunksize = max(1, -(-n // (4 * comm.Get_size())))
+    chunks = [slice(i, min(i + chunksize, n)) for i in range(0, n, chunksize)]
+
+    def fn(i):
+        bi = b._columns(chunks[i]).run(**run_kwargs)
+        return bi.out, bi.out_extra
+
+    results = _map(comm, fn, len(chunks), balance)
+    if results is None:
+        return None
+
+    b.out.update({k: np.concatenate([r[0][k] for r in results]) for k in results[0][0]})
+
+    # chunks with the sun below the horizon in all columns have no extra outputs
+    # (see `ColumnBatch.run`), so they are filled with zeros
+    extra = next((r[1] for r in results if r[1]), {})
+
+    def chunk_extra(r, k):
+        if r[1]:
+            return r[1][k]
+        ncol = r[0]["F"].shape[0]
+        return np.zeros((ncol,) + extra[k].shape[1:], dtype=extra[k].dtype)
+
+    b.out_extra = {k: np.concatenate([chunk_extra(r, k) for r in results]) for k in extra}
+    b._run_count += 1
+
+    return b
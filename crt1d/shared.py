@@ -0,0 +1,87 @@
+"""
+Read-only arrays published once in shared memory (:mod:`multiprocessing.shared_memory`),
+so that worker processes (e.g. in :func:`crt1d.model.run_sensitivity`)
+can use them without each getting their own copy.
+"""
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+__all__ = ("SharedArrays", "attach")
+
+
+_ALIGN = 64  # bytes
+
+_attached = {}
+# ^ shared memory blocks attached to in this process, by name,
+#   kept open for as long as the process might be using the arrays
+
+
+class SharedArrays:
+    """Publish a dict of arrays in one shared memory block.
+
+    The publishing process owns the block: use as a context manager, or call :meth:`close`,
+    to release it when the workers are done.
+    Workers get the arrays with :func:`attach` (zero-copy, read-only),
+    passing :attr:`spec`, which is small and picklable.
+
+    Parameters
+    ----------
+    arrays : dict
+        Arrays to publish (copied into the shared memory block).
+    """
+
+    def __init__(self, arrays):
+        layout = {}
+        offset = 0
+        for k, a in arrays.items():
+            a = np.asarray(a)
+            layout[k] = (a.shape, a.dtype.str, offset)
+            offset += -(-a.nbytes // _ALIGN) * _ALIGN
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for k, a in arrays.items():
+            shape, dtype, offset = layout[k]
+            np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)[...] = a
+
+        self.spec = (self._shm.name, layout)
+        """Name of the shared memory block and the array layout, to pass to :func:`attach`."""
+
+    def close(self):
+        """Release the shared memory block."""
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(spec):
+    """Return dict of read-only arrays backed by the shared memory block described by `spec`
+    (:attr:`SharedArrays.spec`).
+
+    Intended for child processes of the publisher (e.g., :mod:`concurrent.futures` workers).
+    """
+    name, layout = spec
+    try:
+        shm = _attached[name]
+    except KeyError:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Child processes share the publisher's resource tracker,
+            # so registering the block again here has no effect
+            shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+
+    arrays = {}
+    for k, (shape, dtype, offset) in layout.items():
+        a = np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)
+        a.flags.writeable = False
+        arrays[k] = a
+
+    return arrays
@@ -0,0 +1,64 @@
+"""
+Solar geometry, for driving the model with time series (see :meth:`crt1d.Model.run_series`).
+"""
+import numpy as np
+
+__all__ = ("solar_zenith_angle",)
+
+
+def solar_zenith_angle(times, lat, lon):
+    r"""Solar zenith angle :math:`\psi` (radians) for UTC `times` at location (`lat`, `lon`).
+
+    Vectorized over `times` (and `lat`/`lon`, which broadcast with `times`).
+    Uses the NOAA general solar position equations
+    (Fourier series for the declination and equation of time, Spencer 1971),
+    which have errors of up to a few tenths of a degree (no refraction correction).
+
+    Parameters
+    ----------
+    times : array_like
+        UTC times, convertible to :class:`numpy.datetime64`
+        (e.g., :class:`pandas.DatetimeIndex` or strings).
+    lat, lon : float or array_like
+        Latitude and longitude (degrees; longitude east positive).
+
+    References
+    ----------
+    * https://gml.noaa.gov/grad/solcalc/solareqns.PDF
+    """
+    t = np.asarray(times, dtype="datetime64[ns]")
+    year = t.astype("datetime64[Y]")
+    day = t.astype("datetime64[D]")
+    doy = (day - year).astype(int) + 1  # day of year, 1-based
+    ndays = ((year + 1).astype("datetime64[D]") - year.astype("datetime64[D]")).astype(int)
+    hour = (t - day).astype("timedelta64[ns]").astype(float) / 3.6e12
+
+    # fractional year (radians)
+    g = 2 * np.pi / ndays * (doy - 1 + (hour - 12) / 24)
+
+    # equation of time (minutes) and declination (radians)
+    eqtime = 229.18 * (
+        0.000075
+        + 0.001868 * np.cos(g)
+        - 0.032077 * np.sin(g)
+        - 0.014615 * np.cos(2 * g)
+        - 0.040849 * np.sin(2 * g)
+    )
+    decl = (
+        0.006918
+        - 0.399912 * np.cos(g)
+        + 0.070257 * np.sin(g)
+        - 0.006758 * np.cos(2 * g)
+        + 0.000907 * np.sin(2 * g)
+        - 0.002697 * np.cos(3 * g)
+        + 0.00148 * np.sin(3 * g)
+    )
+
+    # true solar time (minutes) and hour angle (radians)
+    tst = hour * 60 + eqtime + 4 * np.asarray(lon)
+    ha = np.deg2rad(tst / 4 - 180)
+
+    lat = np.deg2rad(lat)
+    cos_psi = np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * np.cos(ha)
+
+    return np.arccos(np.clip(cos_psi, -1, 1))
@@ -44,6 +44,10 @@ AVAILABLE_SCHEMES = {scheme_name: {} for scheme_name in _scheme_names}
 Dictionary of available canopy RT schemes, where keys are the scheme name/ID,
 and values are dicts of scheme info: ``short_name``, ``long_name``,
 ``solver`` (the associated solver function), etc.
+``batched`` indicates that the solver supports a batch of canopy columns in one call
+(see :class:`crt1d.ColumnBatch`).
+``backends`` are the array backends the solver can be run with
+(see :class:`crt1d.Model` `backend`).
 """
 
 # TODO: fn to load one scheme at a time, to support user adding their own from outside the package
@@ -70,6 +74,8 @@ def _construct_scheme_dicts():
         solver = getattr(module, solve_fun_name)  # get solver function
         short_name = getattr(module, "short_name", name)
         long_name = getattr(module, "long_name", "")
+        batched = getattr(module, "batched", False)
+        backends = getattr(module, "backends", ("numpy",))
         if not long_name:
             warnings.warn(f"`long_name` not defined for solver module {module_name!r}")
 
@@ -77,6 +83,8 @@ def _construct_scheme_dicts():
         scheme_dict["short_name"] = short_name
         scheme_dict["long_name"] = long_name
         scheme_dict["solver"] = solver
+        scheme_dict["batched"] = batched
+        scheme_dict["backends"] = backends
 
     # extract signature
     drop_list = []
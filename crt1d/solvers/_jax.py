@@ -0,0 +1,66 @@
+"""
+Running the closed-form schemes with JAX (``Model(..., backend='jax')``).
+
+The solvers of the schemes with ``'jax'`` in their ``backends`` are written against
+the array namespace of their inputs (:func:`crt1d.utils.array_namespace`),
+so with JAX array inputs they can be traced, jit-compiled, vmapped and differentiated.
+"""
+import functools
+
+from ..utils import array_namespace
+
+JAX_ARGS = ("psi", "I_dr0_all", "I_df0_all", "lai", "leaf_t", "leaf_r", "soil_r")
+"""Solver arguments that are passed as (traced) JAX arrays.
+The others (e.g., `G_fn`, `mla`, and the scheme options) are fixed in the compiled function."""
+
+
+def import_jax():
+    """Import and return :mod:`jax`, with 64-bit floats enabled
+    (JAX uses 32-bit by default)."""
+    try:
+        import jax
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError("JAX is required for the 'jax' backend.") from e
+
+    jax.config.update("jax_enable_x64", True)
+
+    return jax
+
+
+@functools.lru_cache(maxsize=32)
+def jit_solver(scheme_name, G_fn, static_kwargs):
+    r"""Return jit-compiled solver for scheme `scheme_name`, as a function of the :const:`JAX_ARGS`
+    (keyword arguments).
+
+    Parameters
+    ----------
+    G_fn : function
+        Leaf angle distribution :math:`G(\psi)`,
+        which must support JAX arrays (as the ones in :mod:`crt1d.leaf_angle` do).
+        :math:`K_b(\psi)` is computed from it.
+    static_kwargs : tuple of (str, value)
+        Other arguments for the solver (other than `K_b_fn`, `G_fn`), e.g. ``mla``.
+    """
+    from . import AVAILABLE_SCHEMES
+
+    jax = import_jax()
+
+    scheme = AVAILABLE_SCHEMES[scheme_name]
+    if "jax" not in scheme["backends"]:
+        raise ValueError(f"scheme {scheme_name!r} does not support the 'jax' backend.")
+    solver = scheme["solver"]
+
+    def K_b_fn(psi):
+        # NumPy for NumPy `psi` (e.g., the quadrature nodes in `tau_df_fn`)
+        return G_fn(psi) / array_namespace(psi).cos(psi)
+
+    kwargs = dict(static_kwargs)
+    if "K_b_fn" in scheme["args"]:
+        kwargs["K_b_fn"] = K_b_fn
+    if "G_fn" in scheme["args"]:
+        kwargs["G_fn"] = G_fn
+
+    def f(**arrays):
+        return solver(**arrays, **kwargs)
+
+    return jax.jit(f)
@@ -1,12 +1,25 @@
 import numpy as np
-import scipy.integrate as integrate
+
+from .common import CanopyGeometry
 
 short_name = "4s"
 long_name = "Tian et al. four-stream"
 
 
 def solve_4s(
-    *, psi, I_dr0_all, I_df0_all, lai, leaf_t, leaf_r, soil_r, K_b_fn, G_fn, mu_s=0.501  # wl, dwl,
+    *,
+    psi,
+    I_dr0_all,
+    I_df0_all,
+    lai,
+    leaf_t,
+    leaf_r,
+    soil_r,
+    K_b_fn,
+    G_fn,
+    mu_s=0.501,
+    method="eig",
+    geom=None,
 ):
     r"""4-stream from Tian et al. (2007) (featuring Dickinson).
 
@@ -40,7 +53,22 @@ def solve_4s(
 
     * 0.33998, 0.86114: Gauss–Legendre quadrature points for n=4, ~ 70 deg., ~ 31 deg.
       Tian et al. (2007) and Li and Dobbie (1998) find (0.33998) the former to give more accurate results.
+
+    `method` selects how the two-point boundary value problem is solved:
+
+    * ``'eig'`` (default): analytic solution of the constant-coefficient linear system,
+      via eigen-decomposition of the coefficient matrix plus a particular solution
+      for the exponential direct beam source term, with the constants fixed by the
+      boundary conditions. All bands are solved at once.
+
+    * ``'bvp'``: numerical solution with :func:`scipy.integrate.solve_bvp`, band by band
+      (much slower; kept as a reference).
+
+    `geom` (:class:`~crt1d.solvers.common.CanopyGeometry`) can be provided to reuse the
+    integrals of :math:`G`.
     """
+    if method not in ("eig", "bvp"):
+        raise ValueError("invalid `method`. Valid options are 'eig' and 'bvp'.")
 
     K_b = K_b_fn(psi)
     mu = np.cos(psi)
@@ -145,10 +173,30 @@ def solve_4s(
     LAI = lai[0]  # total LAI
     P = 1  # probably phase function ???, 1 indicates isotropic scattering <-- note: not exactly satisfied in the leaf optical data (refl doesn't always = transmit)
     G = G_fn(psi)
-    G_int_1 = integrate.quad(lambda mu_prime: G_fn(np.arccos(mu_prime)), 0, mu_s)[0]
-    G_int_2 = integrate.quad(lambda mu_prime: G_fn(np.arccos(mu_prime)), mu_s, 1)[0]
+    if geom is None:
+        geom = CanopyGeometry(lai, G_fn)
+    G_int_1 = geom.G_int(0, mu_s)
+    G_int_2 = geom.G_int(mu_s, 1)
     # ^ note: Barr code did not do these integrals, assumed a constant G fn
 
+    if method == "eig":
+        return _solve_eig(
+            mu=mu,
+            I_dr0_all=I_dr0_all,
+            I_df0_all=I_df0_all,
+            lai=lai,
+            leaf_t=leaf_t,
+            leaf_r=leaf_r,
+            soil_r=soil_r,
+            G=G,
+            G_int_1=G_int_1,
+            G_int_2=G_int_2,
+            mu_s=mu_s,
+            P=P,
+        )
+
+    import scipy.integrate as integrate
+
     # > allocate arrays in which to save the solutions for each band
     nbands = I_dr0_all.size
     nz = lai.size
@@ -291,3 +339,115 @@ def solve_4s(
 
     # return I_dr_all, I_df_d_all, I_df_u_all, F_all
     return dict(I_dr=I_dr_all, I_df_d=I_df_d_all, I_df_u=I_df_u_all, F=F_all)
+
+
+def _solve_eig(
+    *, mu, I_dr0_all, I_df0_all, lai, leaf_t, leaf_r, soil_r, G, G_int_1, G_int_2, mu_s, P
+):
+    r"""Analytic solution of the Tian et al. (2007) four-stream equations for all bands at once.
+
+    With :math:`x` cumulative LAI from the top and :math:`y` the 4 radiances
+    ``[R2d, R1d, R1u, R2u]``, the equations are
+
+    .. math::
+       y' = M y + s e^{-K_b x}
+
+    with :math:`M` and :math:`s` constant in :math:`x`. The solution is
+
+    .. math::
+       y(x) = \sum_j c_j v_j e^{\lambda_j (x - x_j)} + p e^{-K_b x}, \quad p = -(M + K_b I)^{-1} s
+
+    where :math:`(\lambda_j, v_j)` are the eigenpairs of :math:`M`.
+    The reference point :math:`x_j` is the top (0) for decaying modes and the bottom (LAI)
+    for growing modes so that all of the exponentials are bounded by 1.
+    The :math:`c_j` are found from the top (incident diffuse) and bottom (soil reflection)
+    boundary conditions.
+    Direct and diffuse contributions are solved together since the problem is linear.
+    """
+    LAI = lai[0]
+    K = G / mu  # K_b
+    nb = I_dr0_all.size
+
+    # convert to radiance, as in the BVP version
+    R_dr0 = I_dr0_all / (np.pi * mu)
+    R_df0 = I_df0_all / np.pi
+
+    rho = soil_r
+    omega = leaf_r + leaf_t
+
+    # params; ref eqs. 4 (see the BVP version)
+    mu_1 = 0.5 * mu_s ** 2
+    mu_2 = 0.5 * (1 - mu_s ** 2)
+    alpha = 0.5 * omega * P * (1 - mu_s) * G_int_2
+    beta = 0.5 * omega * P * (1 - mu_s) * G_int_1
+    gamma = 0.5 * omega * P * (mu_s - 0) * G_int_1
+    eps_1 = 0.25 * omega * R_dr0 * P * (mu_s - 0)
+    eps_2 = 0.25 * omega * R_dr0 * P * (1 - mu_s)
+    k_1 = G_int_1
+    k_2 = G_int_2
+
+    # coefficient matrix M, shape (nb, 4, 4)
+    M = np.empty((nb, 4, 4))
+    M[:, 0] = np.stack([alpha - k_2, beta, beta, alpha], axis=-1) / mu_2
+    M[:, 1] = np.stack([beta, gamma - k_1, gamma, beta], axis=-1) / mu_1
+    M[:, 2] = -np.stack([beta, gamma, gamma - k_1, beta], axis=-1) / mu_1
+    M[:, 3] = -np.stack([alpha, beta, beta, alpha - k_2], axis=-1) / mu_2
+
+    # direct beam source term amplitude, shape (nb, 4)
+    s = G * np.stack([eps_2 / mu_2, eps_1 / mu_1, -eps_1 / mu_1, -eps_2 / mu_2], axis=-1)
+
+    # particular solution amplitude
+    p = np.linalg.solve(M + K * np.eye(4), -s[..., np.newaxis])[..., 0]
+
+    # homogeneous solution
+    lam, V = np.linalg.eig(M)  # note: complex if any eigenvalues are
+    x_ref = np.where(lam.real > 0, LAI, 0)
+
+    def E(x):
+        """Homogeneous mode exponentials at `x`, shape ``x.shape + (nb, 4)``."""
+        x = np.asarray(x)[..., np.newaxis, np.newaxis]
+        return np.exp(lam * (x - x_ref))
+
+    # boundary conditions, B c = b
+    # top: downward radiances equal incident diffuse radiance
+    # bottom: upward radiances equal reflected radiance from the soil (eq. 8b)
+    #   R_up = rho / pi * (I_down + mu_0 * pi * R_dr0 * exp(-K LAI))
+    #   where I_down = 2 pi (mu_1 R1d + mu_2 R2d)
+    op_bot = np.zeros((nb, 2, 4))
+    op_bot[:, :, 0] = -2 * rho[:, np.newaxis] * mu_2
+    op_bot[:, :, 1] = -2 * rho[:, np.newaxis] * mu_1
+    op_bot[:, 0, 2] = 1
+    op_bot[:, 1, 3] = 1
+    exp_bot = np.exp(-K * LAI)
+
+    B = np.empty((nb, 4, 4), dtype=V.dtype)
+    B[:, :2] = V[:, :2] * E(0)[:, np.newaxis, :]
+    B[:, 2:] = (op_bot @ V) * E(LAI)[:, np.newaxis, :]
+
+    b = np.empty((nb, 4), dtype=V.dtype)
+    b[:, 0] = R_df0 - p[:, 0]
+    b[:, 1] = R_df0 - p[:, 1]
+    b[:, 2:] = ((rho * mu * R_dr0)[:, np.newaxis] - (op_bot @ p[..., np.newaxis])[..., 0]) * exp_bot
+
+    c = np.linalg.solve(B, b[..., np.newaxis])[..., 0]
+
+    # solution at the LAI levels, shape (nz, nb, 4)
+    y = np.einsum("bij,zbj->zbi", V, c * E(lai)).real
+    y += p * np.exp(-K * lai)[:, np.newaxis, np.newaxis]
+
+    # compute irradiances for the 4 streams from the radiance ("intensity") solution
+    I2d = 2 * np.pi * mu_2 * y[..., 0]
+    I1d = 2 * np.pi * mu_1 * y[..., 1]
+    I1u = 2 * np.pi * mu_1 * y[..., 2]
+    I2u = 2 * np.pi * mu_2 * y[..., 3]
+
+    # downward and upward diffuse
+    I_df_u = I1u + I2u
+    I_df_d = I1d + I2d
+
+    # Beer--Lambert direct beam attenuation
+    I_dr = I_dr0_all * np.exp(-K * lai)[:, np.newaxis]
+
+    F = I_dr / mu + 2 * I_df_u + 2 * I_df_d
+
+    return dict(I_dr=I_dr, I_df_d=I_df_d, I_df_u=I_df_u, F=F)
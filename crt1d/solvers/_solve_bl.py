@@ -1,12 +1,15 @@
-import numpy as np
-
 from .common import (
+    array_namespace,
     # tau_b_fn as tau_b_fn_psi,
+    lai_profile,
+    out_kwargs,
     tau_df_fn,
 )
 
 short_name = "B–L"
 long_name = "Beer–Lambert"
+batched = True
+backends = ("numpy", "jax")
 
 
 def solve_bl(
@@ -18,80 +21,81 @@ def solve_bl(
     leaf_t,
     leaf_r,
     K_b_fn,
+    geom=None,
+    out=None,
 ):
-    """Beer--Lambert solution based on Campbell (1986)
+    r"""Beer--Lambert solution based on Campbell (1986)
     but with some slight modifications to diffuse treatment.
 
     This is (thus far) the simplest scheme included.
+
+    `geom` (:class:`~crt1d.solvers.common.CanopyGeometry`) can be provided to reuse
+    the :math:`\tau_d` profile.
+    `out` (NumPy only) can be a dict of arrays to write (any of) the standard outputs into.
     """
+    xp = array_namespace(psi, I_dr0_all, I_df0_all, lai, leaf_t, leaf_r)
     #
     # > calculate additional needed params
     #
-    mu = np.cos(psi)
+    mu = xp.cos(psi)
     K_b = K_b_fn(psi)  # could put this as default in fn args?
 
+    #
+    # > run for all bands at once: band quantities have shape (nbands,), profiles (nz, nbands)
+    #
+    L = lai_profile(lai)
+
     # > transmission of direct beam
-    tau_b = np.exp(-K_b * lai)
+    tau_b = xp.exp(-K_b * L)
 
     # > transmission of hemispherical diffuse to each point in the LAI profile
-    # tau_df = tau_df_fn(K_b_fn, lai)
-    tau_df = np.zeros(lai.shape)
-    for i in range(lai.size):
-        tau_df[i] = tau_df_fn(K_b_fn, lai[i])
-
-    # > allocate arrays in which to save the solutions for each band
-    nbands = I_dr0_all.size
-    nz = lai.size
-    s = (nz, nbands)  # to make pylint shut up until it supports _like()
-    I_dr_all = np.zeros(s)
-    I_df_d_all = np.zeros(s)
-    I_df_u_all = np.zeros(s)
-    F_all = np.zeros(s)
-
-    #
-    # > run for each band individually
-    #
-    for i in range(nbands):
-
-        # calculate top-of-canopy irradiance present in the band
-        I_dr0 = I_dr0_all[i]  # W / m^2
-        I_df0 = I_df0_all[i]
-
-        # relevant properties for the band (using values at waveband LHS)
-        # tranmission through leaf and reflection by leaf both treated as scattering processes
-        scat = leaf_t[i] + leaf_r[i]
-        alpha = 1 - scat  # absorbed by leaf; ref Moneith & Unsworth p. 47
-        k_prime = np.sqrt(alpha)  # bulk attenuation coeff for a leaf; Moneith & Unsworth eq. 4.16
-
-        K = K_b * k_prime
-        # ^ approx extinction coeff for non-black leaves; ref Moneith & Unsworth p. 120
-
-        tau_g = np.exp(-K * lai)  # grey leaf transmission
-
-        # calculate profiles
-        #   here I_df is just downward diffuse
-        I_dr = I_dr0 * tau_b
-        I_df = I_df0 * tau_df
-
-        # approximate the contribution of scattering of the direct beam to diffuse irradiance within canopy
-        #   using the grey leaf K
-        I_df_dr = I_dr0 * (tau_g - tau_b)
-
-        # approximate the contribution to diffuse from scattered direct.
-        #   assume 1/2 downward, 1/2 upward for now
-        #   though a more appropriate fraction (downward vs upward) could be computed, following the Z&Q methods
-        I_df += 0.5 * I_df_dr
-
-        # TODO: get better upward diffuse. it is too high this way
-        # use leaf_r to calculate single scattering from top layer?
-
-        # save
-        I_dr_all[:, i] = I_dr
-        I_df_d_all[:, i] = I_df
-        I_df_u_all[:, i] = 0  # I_df
-        # ^ don't technically have a good expression for upward diffuse currently
-        # I_df_u_all[:,i] = 0.5*I_df_dr  #
-        F_all[:, i] = I_dr / mu + 2 * I_df  # actinic flux (upward + downward hemisphere components)
-        # ^ upward diffuse (which is not good currently) here doesn't contribute to F
+    tau_df = geom.tau_df(L) if geom is not None else tau_df_fn(K_b_fn, L)
+    tau_df = xp.asarray(tau_df, dtype=L.dtype)
+
+    # top-of-canopy irradiance present in each band
+    I_dr0 = I_dr0_all  # W / m^2
+    I_df0 = I_df0_all
+
+    # relevant properties for the bands (using values at waveband LHS)
+    # tranmission through leaf and reflection by leaf both treated as scattering processes
+    scat = leaf_t + leaf_r
+    alpha = 1 - scat  # absorbed by leaf; ref Moneith & Unsworth p. 47
+    k_prime = xp.sqrt(alpha)  # bulk attenuation coeff for a leaf; Moneith & Unsworth eq. 4.16
+
+    K = K_b * k_prime
+    # ^ approx extinction coeff for non-black leaves; ref Moneith & Unsworth p. 120
+
+    tau_g = xp.exp(-K * L)  # grey leaf transmission
+
+    # calculate profiles
+    #   here I_df is just downward diffuse
+    I_dr = xp.multiply(I_dr0, tau_b, **out_kwargs(out, "I_dr"))
+    I_df = xp.multiply(I_df0, tau_df, **out_kwargs(out, "I_df_d"))
+
+    # approximate the contribution of scattering of the direct beam to diffuse irradiance within canopy
+    #   using the grey leaf K
+    I_df_dr = I_dr0 * (tau_g - tau_b)
+
+    # approximate the contribution to diffuse from scattered direct.
+    #   assume 1/2 downward, 1/2 upward for now
+    #   though a more appropriate fraction (downward vs upward) could be computed, following the Z&Q methods
+    I_df += 0.5 * I_df_dr
+
+    # TODO: get better upward diffuse. it is too high this way
+    # use leaf_r to calculate single scattering from top layer?
+
+    # save
+    I_dr_all = I_dr
+    I_df_d_all = I_df
+    if out is not None and "I_df_u" in out:
+        I_df_u_all = out["I_df_u"]
+        I_df_u_all.fill(0)
+    else:
+        I_df_u_all = xp.zeros_like(I_df)  # I_df
+    # ^ don't technically have a good expression for upward diffuse currently
+    # I_df_u_all = 0.5*I_df_dr  #
+    F_all = xp.divide(I_dr, mu, **out_kwargs(out, "F"))
+    F_all += 2 * I_df  # actinic flux (upward + downward hemisphere components)
+    # ^ upward diffuse (which is not good currently) here doesn't contribute to F
 
     return dict(I_dr=I_dr_all, I_df_d=I_df_d_all, I_df_u=I_df_u_all, F=F_all)
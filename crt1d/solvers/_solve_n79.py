@@ -1,6 +1,7 @@
 # fmt: off
 import numpy as np
 
+from .common import cached_factor
 from .common import tau_b_fn
 from .common import tau_df_fn
 
@@ -17,9 +18,17 @@ def solve_n79(
     leaf_t, leaf_r,
     soil_r,
     K_b_fn,
-    tau_d_method="quad",  # set to '9sky' to compare to Bonan
+    tau_d_method="gauss",  # set to '9sky' to compare to Bonan
+    geom=None,
+    cache=None,
 ):
-    """Norman (1979) canopy radiation solution.
+    r"""Norman (1979) canopy radiation solution.
+
+    `geom` (:class:`~crt1d.solvers.common.CanopyGeometry`) can be provided to reuse
+    the layer :math:`\tau_d` values.
+
+    `cache` (dict) can be provided to store the factorization of the equation set
+    (which does not depend on :math:`\psi`) for reuse in subsequent calls.
 
     References
     ----------
@@ -51,7 +60,10 @@ def solve_n79(
     assert tb.size == tbcum.size - 1
 
     # `td` (\tau_d) - exponential transmittance of diffuse radiation through each layer
-    td = tau_df_fn(K_b_fn, dlai, method=tau_d_method)
+    if geom is not None:
+        td = geom.tau_df(dlai, method=tau_d_method)
+    else:
+        td = tau_df_fn(K_b_fn, dlai, method=tau_d_method)
 
     # Variables needed for absorption calc
     omega = rho + tau  # scattering coeff
@@ -59,101 +71,80 @@ def solve_n79(
     fracsun = np.exp(-K_b * laim)  # midlayer sunlit leaf fraction
     fracsha = 1 - fracsun
 
-    # Preallocate solution arrays
+    # Band quantities have shape (nb,), layer quantities are made columns to broadcast
     nz = lai.size
     nb = leaf_t.size
-    I_dr = np.zeros((nz, nb))
-    I_df_d = np.zeros_like(I_dr)
-    I_df_u = np.zeros_like(I_dr)
-    aI_lsl = np.zeros((nz-1, nb))
-    aI_lsh = np.zeros_like(aI_lsl)
-
-    for i in range(nb):  # waveband loop
-
-        # Preallocate equation arrays
-        a = np.zeros((2*nz,))
-        b = np.zeros_like(a)
+    dtype = np.result_type(I_dr0_all, I_df0_all, leaf_r, leaf_t, soil_r)
+    td = np.asarray(td, dtype=dtype)
+    td_ = td[:, np.newaxis]
+    tb_ = tb[:, np.newaxis]
+    tbcum_ = tbcum[:, np.newaxis]
+
+    # Layer reflectance and transmittance of diffuse, shape (nz-1, nb)
+    refld = (1 - td_) * rho
+    trand = (1 - td_) * tau + td_
+
+    # Upward (f, e) and downward (a, b) flux equation coeffs have the same form
+    fiv = aiv = refld - trand * trand / refld
+    eiv = biv = trand / refld
+
+    # Equation arrays
+    # Even rows are the upward flux equations, odd rows downward
+    # The LHS (a, b, c) does not depend on psi, so its factorization can be reused
+    def make_abc():
+        a = np.zeros((2*nz, nb), dtype=dtype)
+        b = np.ones_like(a)
         c = np.zeros_like(a)
-        d = np.zeros_like(a)
 
-        # Soil: upward flux
+        # Soil: upward flux, downward flux
         a[0] = 0
-        b[0] = 1
-        c[0] = -albsoid[i]
-        d[0] = swskyb[i] * tbcum[0] * albsoib[i]
-
-        # Soil: downward flux
-        refld = (1 - td[1]) * rho[i]
-        trand = (1 - td[1]) * tau[i] + td[1]
-        aiv = refld - trand * trand / refld
-        biv = trand / refld
-        a[1] = -aiv
-        b[1] = 1
-        c[1] = -biv
-        d[1] = swskyb[i] * tbcum[1] * (1 - tb[1]) * (tau[i] - rho[i] * biv)
-
-        # Inner canopy layers (excluding toc LAI=0 layer)
-        for j in range(nz - 2):
-
-            # Equation indices for this layer
-            ju = 2 * (j + 1)
-            jd = ju + 1
-
-            # Upward flux
-            refld = (1 - td[j]) * rho[i]
-            trand = (1 - td[j]) * tau[i] + td[j]
-            fiv = refld - trand * trand / refld
-            eiv = trand / refld
-            a[ju] = -eiv
-            b[ju] = 1
-            c[ju] = -fiv
-            d[ju] = swskyb[i] * tbcum[j+1] * (1 - tb[j]) * (rho[i] - tau[i] * eiv)
-
-            # Downward flux
-            refld = (1 - td[j+1]) * rho[i]
-            trand = (1 - td[j+1]) * tau[i] + td[j+1]
-            aiv = refld - trand * trand / refld
-            biv = trand / refld
-            a[jd] = -aiv
-            b[jd] = 1
-            c[jd] = -biv
-            d[jd] = swskyb[i] * tbcum[j+1+1] * (1 - tb[j+1]) * (tau[i] - rho[i] * biv)
-
-        # Top canopy layer: upward flux
-        refld = (1 - td[-1]) * rho[i]
-        trand = (1 - td[-1]) * tau[i] + td[-1]
-        fiv = refld - trand * trand / refld
-        eiv = trand / refld
-        a[-2] = -eiv
-        b[-2] = 1
-        c[-2] = -fiv
-        d[-2] = swskyb[i] * tbcum[-1] * (1 - tb[-1]) * (rho[i] - tau[i] * eiv)
+        c[0] = -albsoid
+        a[1] = -aiv[1]
+        c[1] = -biv[1]
+
+        # Canopy layers: upward flux (including top canopy layer)
+        a[2::2] = -eiv
+        c[2::2] = -fiv
+
+        # Inner canopy layers: downward flux (excluding toc LAI=0 layer)
+        a[3:-1:2] = -aiv[1:]
+        c[3:-1:2] = -biv[1:]
 
         # Top canopy layer: downward flux
         a[-1] = 0
-        b[-1] = 1
         c[-1] = 0
-        d[-1] = swskyd[i]
 
-        # Solve system
-        res = tdma(a, b, c, d)
+        return a, b, c
+
+    key = ("n79", td.tobytes(), rho.tobytes(), tau.tobytes(), albsoid.tobytes())
+    fac = cached_factor(cache, key, make_abc)
+
+    d = np.zeros((2*nz, nb), dtype=dtype)
+    d[0] = swskyb * tbcum[0] * albsoib
+    d[1] = swskyb * tbcum[1] * (1 - tb[1]) * (tau - rho * biv[1])
+    d[2::2] = swskyb * tbcum_[1:] * (1 - tb_) * (rho - tau * eiv)
+    d[3:-1:2] = swskyb * tbcum_[2:] * (1 - tb_[1:]) * (tau - rho * biv[1:])
+    d[-1] = swskyd
+
+    # Solve the systems for all bands
+    res = fac.solve(d)
 
-        # Grab irradiance solutions
-        swup = res[::2]   # upward flux above layer
-        swdn = res[1::2]  # downward flux above layer (onto layer)
+    # Grab irradiance solutions
+    swup = res[::2]   # upward flux above layer
+    swdn = res[1::2]  # downward flux above layer (onto layer)
 
-        # Calculate irradiance absorbed by leaves as in the scheme
-        direct = swskyb[i] * tbcum[1:] * (1 - tb) * (1 - omega[i])  # absorbed direct
-        diffuse = (swdn[1:] + swup[:-1]) * (1 - td) * (1 - omega[i])  # absorbed diffuse
-        sun = diffuse * fracsun + direct  # absorbed by sunlit leaves
-        shade = diffuse * fracsha  # shaded leaves
+    # Calculate irradiance absorbed by leaves as in the scheme
+    direct = swskyb * tbcum_[1:] * (1 - tb_) * (1 - omega)  # absorbed direct
+    diffuse = (swdn[1:] + swup[:-1]) * (1 - td_) * (1 - omega)  # absorbed diffuse
+    sun = diffuse * fracsun[:, np.newaxis] + direct  # absorbed by sunlit leaves
+    shade = diffuse * fracsha[:, np.newaxis]  # shaded leaves
 
-        # Store results for band `i`
-        I_dr[:,i] = swskyb[i] * tbcum
-        I_df_d[:,i] = swdn
-        I_df_u[:,i] = swup
-        aI_lsl[:,i] = sun / (fracsun * dlai)
-        aI_lsh[:,i] = shade / (fracsha * dlai)
+    # Store results
+    I_dr = swskyb * tbcum_
+    I_df_d = swdn
+    I_df_u = swup
+    aI_lsl = sun / (fracsun * dlai)[:, np.newaxis]
+    aI_lsh = shade / (fracsha * dlai)[:, np.newaxis]
 
     return {
         "I_dr": I_dr,
@@ -163,39 +154,3 @@ def solve_n79(
         "aI_lsl": aI_lsl,
         "aI_lsh": aI_lsh,
     }
-
-
-def tdma(a, b, c, d):
-    """Tridiagonal matrix algorithm
-    for `a` below diagonal, `b` diagonal, `c` above diagonal and `d` RHS.
-
-    Parameters
-    ----------
-    a, b, c, d : array
-        Same size!
-
-    References
-    ----------
-    * https://github.com/gbonan/bonanmodeling/blob/master/sp_14_03/tridiagonal_solver.m
-    """
-    n = a.size
-
-    # Forward sweep 1
-    e = np.zeros_like(a)
-    e[0] = c[0] / b[0]
-    for i in range(1, n-1):
-        e[i] = c[i] / (b[i] - a[i] * e[i-1])
-
-    # Forward sweep 2
-    f = np.zeros_like(a)
-    f[0] = d[0] / b[0]
-    for i in range(1, n):
-        f[i] = (d[i] - a[i] * f[i-1]) / (b[i] - a[i] * e[i-1])
-
-    # Backwards substitution for solution
-    u = np.zeros_like(a)
-    u[-1] = f[-1]
-    for i in range(n-2, -1, -1):
-        u[i] = f[i] - e[i] * u[i+1]
-
-    return u
@@ -5,11 +5,12 @@ Modifications
 
 * remove unneeded figure stuff
 
-*
+* solve all wavebands at once (array assembly, batched tridiagonal solve)
 
 """
 import numpy as np
 
+from .common import cached_factor
 from .common import K_df_fn
 from .common import tau_df_fn
 
@@ -31,9 +32,16 @@ def solve_zq_pa(
     leaf_r,
     soil_r,
     K_b_fn,
+    geom=None,
+    cache=None,
 ):
-    """
+    r"""Zhao & Qualls model, as implemented in pyAPES.
+
+    `geom` (:class:`~crt1d.solvers.common.CanopyGeometry`) can be provided to reuse
+    :math:`K_d` and the layer :math:`\tau_d` value.
 
+    `cache` (dict) can be provided to store the factorization of the matrix A
+    (which does not depend on :math:`\psi`) for reuse in subsequent calls.
 
     Original notes from Samuli:
 
@@ -104,310 +112,233 @@ def solve_zq_pa(
 
     # Kb and Kd using the existing machinery (passing in K_b_fn)
     Kb = K_b_fn(psi)
-    Kd = K_df_fn(K_b_fn, LAI)
-
-    # allocate arrays in which to save the solutions for each band
+    if geom is not None:
+        Kd = geom.K_df(LAI)
+    else:
+        Kd = K_df_fn(K_b_fn, LAI)
+
+    # cumulative plant area from top
+    Lcum = np.cumsum(np.flipud(L), 0)
+    # ^ 0, ..., LAI, LAI
+
+    # fraction of sunlit & shad ground area in a layer (-)
+    f_sl = np.flipud(np.exp(-Kb * (Lcum)))
+    # defined this way, f_sl[0] == 1
+
+    # propability for beam and diffuse penetration through layer without interception
+    taub = np.zeros([M + 2])
+    taud = np.zeros([M + 2])
+    taub[0 : M + 2] = np.exp(-Kb * L)
+    # taud[0:M+2] = np.exp(-Kd*L)  # < original expression
+    if geom is not None:
+        taud[0 : M + 2] = geom.tau_df(LAI / M)  # there is LAI/M in each layer
+    else:
+        taud[0 : M + 2] = tau_df_fn(K_b_fn, LAI / M)
+    # ^ not equivalent to original expression!
+
+    # soil surface is non-transparent
+    taub[0] = 0.0
+    taud[0] = 0.0
+
+    # --- all bands at once from here on
+    # band quantities have shape (nbands,), layer quantities (M+2, nbands)
     nbands = I_dr0_all.size
-    nz = lai.size
-    s = (nz, nbands)  # to make pylint shut up until it supports _like()
-    I_dr_all = np.zeros(s)
-    I_df_d_all = np.zeros(s)
-    I_df_u_all = np.zeros(s)
-    F_all = np.zeros(s)
-    # I_df_d_ss_all = np.zeros(s)
-    # I_df_u_ss_all = np.zeros(s)
-    # F_ss_all      = np.zeros(s)
-
-    for ib in range(nbands):
-        # get irradiances in current band
-        IbSky = I_dr0_all[ib]
-        IdSky = I_df0_all[ib]
-
-        # --- check inputs and create local variables
-        # // IbSky = max(IbSky, 0.0001)
-        # // IdSky = max(IdSky, 0.0001)
-        # ^ this can skew results (irradiance in a band often less than 0.0001)
-        #   instead we check inputs before passing in here
-
-        # get optical param values in the band
-        beta_L = leaf_r[ib]
-        tau_L = leaf_t[ib]
-        LeafAlbedo = beta_L + tau_L  # combined scattering
-        # alpha_L = 1 - LeafAlbedo  # absorption
-        SoilAlbedo = soil_r[ib]
-
-        # ---- optical parameters
-        aL = np.ones([M + 2]) * (1 - LeafAlbedo)  # leaf absorptivity
-        tL = (
-            np.ones([M + 2]) * tau_L / LeafAlbedo
-        )  # transmission as fraction of scattered radiation
-        rL = np.ones([M + 2]) * beta_L / LeafAlbedo  # reflection as fraction of scattered radiation
-
-        # soil surface, no transmission
-        aL[0] = 1.0 - SoilAlbedo
-        tL[0] = 0.0
-        rL[0] = 1.0
-
-        # upper boundary = atm. is transparent for SW
-        aL[M + 1] = 0.0
-        tL[M + 1] = 1.0
-        rL[M + 1] = 0.0
-
-        # cumulative plant area from top
-        # even though doesn't change with wavelength, need to define here since it is modified later
-        Lcum = np.cumsum(np.flipud(L), 0)
-        # ^ 0, ..., LAI, LAI
-
-        # fraction of sunlit & shad ground area in a layer (-)
-        # even though doesn't change with wavelength, need to define here since it is modified later
-        f_sl = np.flipud(np.exp(-Kb * (Lcum)))
-        # defined this way, f_sl[0] == 1
-
-        # beam radiation at each layer
-        Ib = f_sl * IbSky
-
-        # propability for beam and diffuse penetration through layer without interception
-        taub = np.zeros([M + 2])
-        taud = np.zeros([M + 2])
-        taub[0 : M + 2] = np.exp(-Kb * L)
-        # taud[0:M+2] = np.exp(-Kd*L)  # < original expression
-        taud[0 : M + 2] = tau_df_fn(K_b_fn, LAI / M)  # there is LAI/M in each layer
-        # ^ not equivalent to original expression!
-
-        # soil surface is non-transparent
-        taub[0] = 0.0
-        taud[0] = 0.0
-
-        # backward-scattering functions (eq. 22-23) for beam rb and diffuse rd
-        rb = np.zeros([M + 2])
-        rd = np.zeros([M + 2])
-        rb = 0.5 + 0.3334 * (rL - tL) / (rL + tL) * np.cos(ZEN)
-        rd = 2.0 / 3.0 * rL / (rL + tL) + 1.0 / 3.0 * tL / (rL + tL)
-
-        rb[0] = 1.0
-        rd[0] = 1.0
-        rb[M + 1] = 0.0
-        rd[M + 1] = 0.0
-
-        # --- set up tridiagonal matrix A and solve SW without multiple scattering
-        # from A*SW = C (Zhao & Qualls, 2006. eq. 39 & 42)
-        A = np.zeros([2 * M + 2, 2 * M + 2])
-
-        # lowermost rows: 0 = soil surface, M+2 is upper boundary
-        A[0, 0] = 1.0
-
-        A[1, 0] = -(taud[1] + (1 - taud[1]) * (1 - aL[1]) * (1 - rd[1]))
-        A[1, 1] = -1 * (taud[1] + (1 - taud[1]) * (1 - aL[1]) * (1 - rd[1])) * (1 - aL[0])
-        A[1, 2] = 1 - 1 * rd[1] * (1 - aL[0]) * 1 * (1 - aL[1]) * (1 - taud[1])
+    dtype = np.result_type(I_dr0_all, I_df0_all, leaf_r, leaf_t, soil_r)
+    taub = taub[:, np.newaxis].astype(dtype)
+    taud = taud[:, np.newaxis].astype(dtype)
+
+    # get irradiances in the bands
+    IbSky = I_dr0_all
+    IdSky = I_df0_all
+
+    # --- check inputs and create local variables
+    # // IbSky = max(IbSky, 0.0001)
+    # // IdSky = max(IdSky, 0.0001)
+    # ^ this can skew results (irradiance in a band often less than 0.0001)
+    #   instead we check inputs before passing in here
+
+    # get optical param values in the bands
+    beta_L = leaf_r
+    tau_L = leaf_t
+    LeafAlbedo = beta_L + tau_L  # combined scattering
+    # alpha_L = 1 - LeafAlbedo  # absorption
+    SoilAlbedo = soil_r
+
+    # beam radiation at each layer
+    Ib = f_sl[:, np.newaxis].astype(dtype) * IbSky
+
+    # ---- optical parameters
+    ones = np.ones([M + 2, nbands], dtype=dtype)
+    aL = ones * (1 - LeafAlbedo)  # leaf absorptivity
+    tL = ones * tau_L / LeafAlbedo  # transmission as fraction of scattered radiation
+    rL = ones * beta_L / LeafAlbedo  # reflection as fraction of scattered radiation
+
+    # soil surface, no transmission
+    aL[0] = 1.0 - SoilAlbedo
+    tL[0] = 0.0
+    rL[0] = 1.0
+
+    # upper boundary = atm. is transparent for SW
+    aL[M + 1] = 0.0
+    tL[M + 1] = 1.0
+    rL[M + 1] = 0.0
+
+    # backward-scattering functions (eq. 22-23) for beam rb and diffuse rd
+    rb = 0.5 + 0.3334 * (rL - tL) / (rL + tL) * np.cos(ZEN)
+    rd = 2.0 / 3.0 * rL / (rL + tL) + 1.0 / 3.0 * tL / (rL + tL)
+
+    rb[0] = 1.0
+    rd[0] = 1.0
+    rb[M + 1] = 0.0
+    rd[M + 1] = 0.0
+
+    # layer indices; k and k+1 (k-1 and k) for the rows of the middle layers
+    k = np.arange(1, M + 1)
+    km1 = k - 1
+    kp1 = k + 1
+
+    # multiple-reflection denominators between layers k-1 and k (lo) and k and k+1 (hi)
+    D_lo = 1 - rd[km1] * rd[k] * (1 - aL[km1]) * (1 - taud[km1]) * (1 - aL[k]) * (1 - taud[k])
+    D_hi = 1 - rd[k] * rd[kp1] * (1 - aL[k]) * (1 - taud[k]) * (1 - aL[kp1]) * (1 - taud[kp1])
+
+    # --- set up tridiagonal matrix A and solve SW without multiple scattering
+    # from A*SW = C (Zhao & Qualls, 2006. eq. 39 & 42)
+    # A is stored as its three diagonals: A_l[j] = A[j,j-1], A_d[j] = A[j,j], A_u[j] = A[j,j+1]
+    # A does not depend on ZEN, so its factorization can be reused
+    def make_abc(k=k, km1=km1, kp1=kp1):
+        A_l = np.zeros([2 * M + 2, nbands], dtype=dtype)
+        A_d = np.zeros_like(A_l)
+        A_u = np.zeros_like(A_l)
+
+        # fraction of diffuse passing through layer k, directly or after forward scattering
+        Td = taud[k] + (1 - taud[k]) * (1 - aL[k]) * (1 - rd[k])
+
+        # lowermost row: 0 = soil surface
+        A_d[0] = 1.0
 
         # middle rows
-        for k in range(1, M + 1):
-            A[2 * k - 1, 2 * k - 2] = -(taud[k] + (1 - taud[k]) * (1 - aL[k]) * (1 - rd[k]))
-            A[2 * k - 1, 2 * k - 1] = (
-                -rd[k - 1]
-                * (taud[k] + (1 - taud[k]) * (1 - aL[k]) * (1 - rd[k]))
-                * (1 - aL[k - 1])
-                * (1 - taud[k - 1])
-            )
-            A[2 * k - 1, 2 * k] = 1 - rd[k - 1] * rd[k] * (1 - aL[k - 1]) * (1 - taud[k - 1]) * (
-                1 - aL[k]
-            ) * (1 - taud[k])
-
-            A[2 * k, 2 * k - 1] = 1 - rd[k] * rd[k + 1] * (1 - aL[k]) * (1 - taud[k]) * (
-                1 - aL[k + 1]
-            ) * (1 - taud[k + 1])
-            A[2 * k, 2 * k] = (
-                -rd[k + 1]
-                * (taud[k] + (1 - taud[k]) * (1 - aL[k]) * (1 - rd[k]))
-                * (1 - aL[k + 1])
-                * (1 - taud[k + 1])
-            )
-            A[2 * k, 2 * k + 1] = -(taud[k] + (1 - taud[k]) * (1 - aL[k]) * (1 - rd[k]))
+        A_l[2 * k - 1] = -Td
+        A_d[2 * k - 1] = -rd[km1] * Td * (1 - aL[km1]) * (1 - taud[km1])
+        A_u[2 * k - 1] = D_lo
+
+        A_l[2 * k] = D_hi
+        A_d[2 * k] = -rd[kp1] * Td * (1 - aL[kp1]) * (1 - taud[kp1])
+        A_u[2 * k] = -Td
 
         # uppermost node2*M+2
-        A[2 * M + 1, 2 * M + 1] = 1.0
-        del k
-        # print A
-
-        # --- RHS vector C
-        C = np.zeros([2 * M + 2, 1])
-
-        # lowermost row
-        C[0] = SoilAlbedo * Ib[0]
-        # C[0] = SoilAlbedo*Ib[-1]
-        n = 1  # dummy
-        for k in range(1, M + 1):  # k=2:M-1,
-            C[n] = (
-                (
-                    1
-                    - rd[k - 1]
-                    * rd[k]
-                    * (1 - aL[k - 1])
-                    * (1 - taud[k - 1])
-                    * (1 - aL[k])
-                    * (1 - taud[k])
-                )
-                * rb[k]
-                * (1 - taub[k])
-                * (1 - aL[k])
-                * Ib[k]
-            )
-            C[n + 1] = (
-                (
-                    1
-                    - rd[k]
-                    * rd[k + 1]
-                    * (1 - aL[k])
-                    * (1 - taud[k])
-                    * (1 - aL[k + 1])
-                    * (1 - taud[k + 1])
-                )
-                * (1 - taub[k])
-                * (1 - aL[k])
-                * (1 - rb[k])
-                * Ib[k]
-            )
-            # Ib(k+1) Ib(k):n sijaan koska tarvitaan kerrokseen tuleva
-            n = n + 2
-
-        # uppermost row
-        C[2 * M + 1] = IdSky
-
-        # ---- solve A*SW = C
-        SW = np.linalg.solve(A, C)
-
-        # upward and downward hemispherical radiation (Wm-2 ground)
-        SWu0 = SW[0 : 2 * M + 2 : 2]
-        SWd0 = SW[1 : 2 * M + 2 : 2]
-        del A, C, SW, k
-
-        # ---- Compute multiple scattering, Zhao & Qualls, 2005. eq. 24 & 25.
-        # downwelling diffuse after multiple scattering, eq. 24
-        SWd = np.zeros([M + 1])
-        for k in range(M - 1, -1, -1):  # downwards from layer k+1 to layer k: M-1..0
-            X = SWd0[k + 1] / (
-                1
-                - rd[k]
-                * rd[k + 1]
-                * (1 - aL[k])
-                * (1 - taud[k])
-                * (1 - aL[k + 1])
-                * (1 - taud[k + 1])
-            )
-            Y = (
-                SWu0[k]
-                * rd[k + 1]
-                * (1 - aL[k + 1])
-                * (1 - taud[k + 1])
-                / (
-                    1
-                    - rd[k]
-                    * rd[k + 1]
-                    * (1 - aL[k])
-                    * (1 - taud[k])
-                    * (1 - aL[k + 1])
-                    * (1 - taud[k + 1])
-                )
-            )
-            SWd[k + 1] = X + Y
-        SWd[0] = SWd[1]  # SWd0[0]
-        # print SWd
-
-        # upwelling diffuse after multiple scattering, eq. 25
-        SWu = np.zeros([M + 1])
-        for k in range(0, M, 1):  # upwards from layer k to layer k+1: 0..M-1
-            X = SWu0[k] / (
-                1
-                - rd[k]
-                * rd[k + 1]
-                * (1 - aL[k])
-                * (1 - taud[k])
-                * (1 - aL[k + 1])
-                * (1 - taud[k + 1])
-            )
-            Y = (
-                SWd0[k + 1]
-                * rd[k]
-                * (1 - aL[k])
-                * (1 - taud[k])
-                / (
-                    1
-                    - rd[k]
-                    * rd[k + 1]
-                    * (1 - aL[k])
-                    * (1 - taud[k])
-                    * (1 - aL[k + 1])
-                    * (1 - taud[k + 1])
-                )
-            )
-            SWu[k] = X + Y
-        SWu[M] = SWu[M - 1]
-
-        # match dimensions of all vectors
-        Ib = Ib[1 : M + 2]
-        f_sl = f_sl[1 : M + 2]
-        Lcum = np.flipud(Lcum[0 : M + 1])
-        aL = aL[0 : M + 1]
-
-        # --- NOW return values back to the original grid
-        f_slo = np.exp(-Kb * (Lcumo))
-        SWbo = f_slo * IbSky  # Beam radiation
-
-        # interpolate diffuse fluxes
-        X = np.flipud(Lcumo)
-        xi = np.flipud(Lcum)
-        SWdo = np.flipud(np.interp(X, xi, np.flipud(SWd)))
-        SWuo = np.flipud(np.interp(X, xi, np.flipud(SWu)))
-        del X, xi
-
-        # incident radiation on sunlit and shaded leaves Wm-2
-        # Q_sh = Clump * Kd * (SWdo + SWuo)  # normal to shaded leaves is all diffuse
-        # Q_sl = Kb * IbSky + Q_sh  # normal to sunlit leaves is direct and diffuse
-
-        # absorbed components
-        aLo = np.ones(Lcumo.size) * (1 - LeafAlbedo)
-        aDiffo = aLo * Kd * (SWdo + SWuo)
-        aDiro = aLo * Kb * IbSky
-
-        # stand albedo
-        # // alb = SWuo[-1] / (IbSky + IdSky + EPS)
+        A_d[2 * M + 1] = 1.0
+
+        return A_l, A_d, A_u
+
+    key = ("zq_pa", M, taud.tobytes(), leaf_r.tobytes(), leaf_t.tobytes(), soil_r.tobytes())
+    fac = cached_factor(cache, key, make_abc, pivot=True)
+
+    # --- RHS vector C
+    C = np.zeros([2 * M + 2, nbands], dtype=dtype)
+
+    # lowermost row
+    C[0] = SoilAlbedo * Ib[0]
+    # C[0] = SoilAlbedo*Ib[-1]
+    C[2 * k - 1] = D_lo * rb[k] * (1 - taub[k]) * (1 - aL[k]) * Ib[k]
+    C[2 * k] = D_hi * (1 - taub[k]) * (1 - aL[k]) * (1 - rb[k]) * Ib[k]
+    # Ib(k+1) Ib(k):n sijaan koska tarvitaan kerrokseen tuleva
+
+    # uppermost row
+    C[2 * M + 1] = IdSky
+
+    # ---- solve A*SW = C
+    SW = fac.solve(C)
+
+    # upward and downward hemispherical radiation (Wm-2 ground)
+    SWu0 = SW[0 : 2 * M + 2 : 2]
+    SWd0 = SW[1 : 2 * M + 2 : 2]
+    del C, SW
+
+    # ---- Compute multiple scattering, Zhao & Qualls, 2005. eq. 24 & 25.
+    # Both only depend on the single-scattering solution, so all layers can be done at once.
+    # layer pairs (k, k+1) for k = 0..M-1
+    k = np.arange(0, M)
+    kp1 = k + 1
+    D = 1 - rd[k] * rd[kp1] * (1 - aL[k]) * (1 - taud[k]) * (1 - aL[kp1]) * (1 - taud[kp1])
+
+    # downwelling diffuse after multiple scattering, eq. 24
+    SWd = np.zeros([M + 1, nbands], dtype=dtype)
+    SWd[kp1] = SWd0[kp1] / D + SWu0[k] * rd[kp1] * (1 - aL[kp1]) * (1 - taud[kp1]) / D
+    SWd[0] = SWd[1]  # SWd0[0]
+
+    # upwelling diffuse after multiple scattering, eq. 25
+    SWu = np.zeros([M + 1, nbands], dtype=dtype)
+    SWu[k] = SWu0[k] / D + SWd0[kp1] * rd[k] * (1 - aL[k]) * (1 - taud[k]) / D
+    SWu[M] = SWu[M - 1]
+    del k, kp1
+
+    # match dimensions of all vectors
+    Ib = Ib[1 : M + 2]
+    f_sl = f_sl[1 : M + 2]
+    Lcum = np.flipud(Lcum[0 : M + 1])
+    aL = aL[0 : M + 1]
+
+    # --- NOW return values back to the original grid
+    f_slo = np.exp(-Kb * (Lcumo))
+    SWbo = f_slo[:, np.newaxis] * IbSky  # Beam radiation
+
+    # interpolate diffuse fluxes
+    X = np.flipud(Lcumo)
+    xi = np.flipud(Lcum)
+    SWdo = np.flipud(_interp_rows(X, xi, np.flipud(SWd)))
+    SWuo = np.flipud(_interp_rows(X, xi, np.flipud(SWu)))
+    del X, xi
+
+    # incident radiation on sunlit and shaded leaves Wm-2
+    # Q_sh = Clump * Kd * (SWdo + SWuo)  # normal to shaded leaves is all diffuse
+    # Q_sl = Kb * IbSky + Q_sh  # normal to sunlit leaves is direct and diffuse
+
+    # absorbed components
+    aLo = np.ones((Lcumo.size, 1), dtype=dtype) * (1 - LeafAlbedo)
+    aDiffo = aLo * Kd * (SWdo + SWuo)
+    aDiro = aLo * Kb * IbSky
+
+    # stand albedo
+    # // alb = SWuo[-1] / (IbSky + IdSky + EPS)
+    # correction to match absorption-based and flux-based albedo, relative error <3% may occur
+    # in daytime conditions, at nighttime relative error can be larger but fluxes are near zero
+    # // aa = (sum(aDiffo*Lo + aDiro*f_slo*Lo) + q_soil) / (IbSky + IdSky + EPS)
+    with np.errstate(divide="ignore", invalid="ignore"):  # bands with no irradiance
         alb = SWuo[-1] / (IbSky + IdSky)
-        # print alb
         # soil absorption (Wm-2 (ground))
         q_soil = (1 - SoilAlbedo) * (SWdo[0] + SWbo[0])
 
-        # correction to match absorption-based and flux-based albedo, relative error <3% may occur
-        # in daytime conditions, at nighttime relative error can be larger but fluxes are near zero
-        # // aa = (sum(aDiffo*Lo + aDiro*f_slo*Lo) + q_soil) / (IbSky + IdSky + EPS)
-        aa = (sum(aDiffo * Lo + aDiro * f_slo * Lo) + q_soil) / (IbSky + IdSky)
+        Lo_ = Lo[:, np.newaxis]
+        aa = (np.sum(aDiffo * Lo_ + aDiro * f_slo[:, np.newaxis] * Lo_, axis=0) + q_soil) / (
+            IbSky + IdSky
+        )
         F = (1.0 - alb) / aa
-        # print('F', F)
-        if F <= 0 or np.isfinite(F) is False:
-            F = 1.0
-
-        aDiro = F * aDiro
-        aDiffo = F * aDiffo
-        q_soil = F * q_soil
-
-        # sunlit fraction in clumped foliage; clumping means elements shade each other
-        f_slo = Clump * f_slo
-
-        # Following adjustment is required for energy conservation, i.e. total absorbed radiation
-        # in a layer must equal difference between total radiation(SWup, SWdn) entering and leaving the layer.
-        # Note that this requirement is not always fullfilled in canopy rad. models.
-        # now sum(q_sl*f_slo* + q_sh*(1-f_slo)*Lo = (1-alb)*(IbSky + IdSky)
-        # q_sh = aDiffo * Clump  # shaded leaves only diffuse
-        # q_sl = q_sh + aDiro  # sunlit leaves diffuse + direct
-
-        # original return:
-        # return SWbo, SWdo, SWuo, Q_sl, Q_sh, q_sl, q_sh, q_soil, f_slo, alb
-
-        # store this band's results
-        I_dr_all[:, ib] = SWbo
-        I_df_u_all[:, ib] = SWuo
-        I_df_d_all[:, ib] = SWdo
-        F_all[:, ib] = SWbo / np.cos(psi) + 2 * SWuo + 2 * SWdo
-        # TODO: add the absorption ones as extra outputs
+    # print('F', F)
+    F[(F <= 0) | ~np.isfinite(F)] = 1.0
+
+    aDiro = F * aDiro
+    aDiffo = F * aDiffo
+    q_soil = F * q_soil
+
+    # sunlit fraction in clumped foliage; clumping means elements shade each other
+    f_slo = Clump * f_slo
+
+    # Following adjustment is required for energy conservation, i.e. total absorbed radiation
+    # in a layer must equal difference between total radiation(SWup, SWdn) entering and leaving the layer.
+    # Note that this requirement is not always fullfilled in canopy rad. models.
+    # now sum(q_sl*f_slo* + q_sh*(1-f_slo)*Lo = (1-alb)*(IbSky + IdSky)
+    # q_sh = aDiffo * Clump  # shaded leaves only diffuse
+    # q_sl = q_sh + aDiro  # sunlit leaves diffuse + direct
+
+    # original return:
+    # return SWbo, SWdo, SWuo, Q_sl, Q_sh, q_sl, q_sh, q_soil, f_slo, alb
+
+    # store results
+    I_dr_all = SWbo
+    I_df_u_all = SWuo
+    I_df_d_all = SWdo
+    F_all = SWbo / np.cos(psi) + 2 * SWuo + 2 * SWdo
+    # TODO: add the absorption ones as extra outputs
 
     return {
         "I_dr": I_dr_all,
@@ -415,3 +346,13 @@ def solve_zq_pa(
         "I_df_u": I_df_u_all,
         "F": F_all,
     }
+
+
+def _interp_rows(x, xp, fp):
+    """Linear interpolation like :func:`numpy.interp`, but for 2-D `fp`,
+    interpolating along the first axis (columns are independent).
+    `xp` must be increasing. Values outside `xp` are clamped to the end values.
+    """
+    j = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, xp.size - 2)
+    w = np.clip((x - xp[j]) / (xp[j + 1] - xp[j]), 0, 1)[:, np.newaxis].astype(fp.dtype)
+    return fp[j] + w * (fp[j + 1] - fp[j])
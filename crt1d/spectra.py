@@ -14,6 +14,8 @@ from scipy.integrate import cumtrapz
 from scipy.integrate import quad
 from scipy.interpolate import InterpolatedUnivariateSpline
 
+from . import kernels
+
 
 BAND_DEFNS_UM = {
     "PAR": (0.4, 0.7),
@@ -291,6 +293,10 @@ def smear_tuv(x, y, bins):
     """
     bins = np.asarray(bins)
     ynew = np.zeros(bins.size - 1)
+    if kernels.current() == "numba":
+        x, y, bins = (np.asarray(a, dtype=float) for a in (x, y, bins))
+        kernels.numba_kernel("smear_tuv")(x, y, bins, ynew)
+        return ynew
     for i, bin_ in enumerate(zip(bins[:-1], bins[1:])):
         ynew[i] = _smear_tuv_1(x, y, bin_)
     return ynew  # valid for band, including one edge, depending on interpretation
@@ -0,0 +1,128 @@
+"""
+This module contains :class:`Stepper`, for calling a scheme repeatedly with new
+solar zenith angle and top-of-canopy irradiance (e.g., every time step of a host
+land-surface model), with less per-call overhead than :meth:`Model.run`.
+"""
+from copy import deepcopy
+
+import numpy as np
+
+from .model import _as_dtype
+from .solvers import RET_KEYS_ALL_SCHEMES
+
+__all__ = ("Stepper",)
+
+
+class Stepper:
+    """Scheme of a :class:`~crt1d.Model` set up for repeated solves
+    where only `psi`, `I_dr0_all` and `I_df0_all` change.
+
+    The model inputs are validated and the solver arguments assembled once, on creation.
+    Each :meth:`step` then only calls the solver and returns its standard outputs
+    (:const:`~crt1d.solvers.RET_KEYS_ALL_SCHEMES`),
+    without the input checks and output bookkeeping of :meth:`Model.run`.
+    The canopy geometry and (for ``'n79'``, ``'zq'``, ``'zq_pa'``) the factorization
+    of the equation set, which do not depend on `psi`, are computed in the first step
+    and reused.
+
+    Steps are not allocation-free: the solvers allocate their intermediate arrays
+    on each call. With `out`, the schemes that support it (``'2s'``, ``'bl'``, ``'bf'``,
+    with the NumPy backend) write their standard outputs directly into the provided arrays;
+    for the others, the outputs are copied into them.
+
+    The parameters are copied from the model, so later changes to the model
+    do not affect the stepper.
+    """
+
+    def __init__(self, m, scheme=None, **solver_kwargs):
+        """
+        Parameters
+        ----------
+        m : Model
+            Model providing the canopy, optical properties, wavebands,
+            and (if `scheme` is not provided) the scheme.
+        scheme : str, optional
+            Identifier for the scheme to use instead of the model's.
+        **solver_kwargs
+            Passed on to the solver, e.g. scheme options.
+        """
+        m = deepcopy(m)
+        if scheme is not None:
+            m.assign_scheme(scheme)
+        m._check_inputs()
+
+        self.model = m
+        """Model (copy) holding the scheme and parameters."""
+
+        self.dtype = m.dtype
+        self.nlev = m.nlev
+        self.nwl = m.nwl
+
+        p = m._p
+        scheme = m.scheme
+        kwargs = {k: p[k] for k in scheme["args"]}
+        if "geom" in scheme["options"]:
+            kwargs["geom"] = m.geom
+        if "cache" in scheme["options"]:
+            kwargs["cache"] = {}
+        for k in ("lai", "leaf_t", "leaf_r", "soil_r"):
+            if k in kwargs:
+                kwargs[k] = np.asarray(kwargs[k], dtype=self.dtype)
+        kwargs.update(solver_kwargs)
+        self._kwargs = kwargs
+        self._solver = m._get_solver()
+        self._solver_out = "out" in scheme["options"] and m.backend == "numpy"
+
+    def __repr__(self):
+        scheme_name = self.model.scheme["name"]
+        return f"Stepper(scheme={scheme_name!r}, nlev={self.nlev}, nwl={self.nwl})"
+
+    def empty_out(self):
+        """New dict of output arrays ``(nlev, nwl)`` for :meth:`step`."""
+        return {k: np.empty((self.nlev, self.nwl), dtype=self.dtype) for k in RET_KEYS_ALL_SCHEMES}
+
+    def step(self, psi, I_dr0, I_df0, out=None):
+        """Solve for solar zenith angle `psi` and top-of-canopy irradiance
+        `I_dr0`, `I_df0` ``(nwl,)``.
+
+        Parameters
+        ----------
+        psi : float
+            Solar zenith angle (radians).
+            For ``psi >= pi/2`` (sun below the horizon), the outputs are set to zero.
+        I_dr0, I_df0 : array_like
+            Direct and diffuse top-of-canopy irradiance in each band.
+            Arrays that already have the stepper :attr:`dtype` are used without a copy.
+        out : dict, optional
+            Arrays ``(nlev, nwl)`` to write the outputs into,
+            for any subset of :const:`~crt1d.solvers.RET_KEYS_ALL_SCHEMES`
+            (e.g., from :meth:`empty_out` or views into host model arrays).
+
+        Returns
+        -------
+        dict
+            `out` if provided, otherwise the solver's output arrays
+            (new arrays each step, not copied).
+        """
+        if psi >= np.pi / 2:
+            if out is None:
+                out = self.empty_out()
+            for v in out.values():
+                v.fill(0)
+            return out
+
+        kwargs = self._kwargs
+        kwargs["psi"] = psi
+        kwargs["I_dr0_all"] = np.asarray(I_dr0, dtype=self.dtype)
+        kwargs["I_df0_all"] = np.asarray(I_df0, dtype=self.dtype)
+        if self._solver_out:
+            kwargs["out"] = out
+        sol = self._solver(**kwargs)
+        if out is None:
+            return {k: _as_dtype(sol[k], self.dtype) for k in RET_KEYS_ALL_SCHEMES}
+
+        if not self._solver_out:
+            for k, v in out.items():
+                np.copyto(v, sol[k], casting="same_kind")
+
+        return out
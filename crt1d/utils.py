@@ -36,3 +36,21 @@ def cf_units_to_tex(s: str):
     s_new = re.sub(r"-?\d", expify, s)
 
     return s_new
+
+
+def array_namespace(*xs):
+    """Array module for arrays `xs`:
+    :mod:`jax.numpy` if any of them is a JAX array (including tracers, e.g. inside :func:`jax.jit`),
+    otherwise :mod:`numpy`.
+    """
+    import sys
+
+    jax = sys.modules.get("jax")  # if JAX hasn't been imported, `xs` can't include JAX arrays
+    if jax is not None and any(isinstance(x, jax.Array) for x in xs):
+        import jax.numpy as jnp
+
+        return jnp
+
+    import numpy as np
+
+    return np
@@ -241,7 +241,8 @@ def _vmd_from_yaml():
 
     p = Path(__file__).parent / "variables.yml"
     with open(p, "r") as f:
-        data = yaml.load(f, Loader=yaml.FullLoader)
+        # the LibYAML-based loader, if available, is much faster
+        data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
     params_allowed = data["variable_params"]
     param_defaults = data["defaults"]
@@ -0,0 +1,117 @@
+"""
+Test crt1d.batch
+"""
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+
+@pytest.mark.parametrize("scheme", ["2s", "bl", "zq"])
+def test_batch_matches_model(scheme):
+    p = crt.Model(scheme, nlayers=30).copy_p()
+    ncol = 4
+    lai = p["lai"] * np.linspace(0.5, 2, ncol)[:, np.newaxis]
+    psi = np.deg2rad(np.linspace(10, 70, ncol))
+    leaf_r = p["leaf_r"] * np.linspace(0.8, 1.1, ncol)[:, np.newaxis]
+
+    b = crt.ColumnBatch(scheme, nlayers=30, lai=lai, psi=psi, leaf_r=leaf_r).run()
+    assert b.ncol == ncol
+    for i in range(ncol):
+        m = crt.Model(scheme, nlayers=30, lai=lai[i], psi=psi[i], leaf_r=leaf_r[i]).run()
+        for k, v in m.out.items():
+            np.testing.assert_allclose(b.out[k][i], v, rtol=1e-12, atol=1e-12)
+
+    ds = b.to_xr()
+    assert ds.I_dr.dims == ("column", "z", "wl")
+    assert ds.psi.dims == ("column",)
+    assert ds.sizes["column"] == ncol
+
+
+def test_batch_invalid_update_reverted():
+    b = crt.ColumnBatch("2s", nlayers=30, psi=np.deg2rad([10, 20, 30]))
+    with pytest.warns(UserWarning, match="Reverting"):
+        b.update_p(psi=np.deg2rad([10, 20]), leaf_r=np.ones((3, 2)))
+    assert b.ncol == 3
+
+
+@pytest.mark.parametrize("scheme", ["2s", "zq"])
+def test_run_dataset_dask(scheme):
+    pytest.importorskip("dask")
+    import xarray as xr
+
+    m0 = crt.Model(scheme, nlayers=30)
+    p = m0.copy_p()
+    leaf_r = p["leaf_r"] * np.linspace(0.8, 1.1, 4)[:, np.newaxis]
+    psi = np.deg2rad(np.linspace(10, 70, 3))
+    ds = xr.Dataset(
+        {"leaf_r": (("member", "wl"), leaf_r), "psi": ("time", psi)},
+    ).chunk({"member": 2, "time": 2})
+
+    out = crt.batch.run_dataset(m0, ds)
+    assert out.F.chunks is not None  # lazy
+    assert out.F.dims == ("time", "member", "z", "wl")
+    assert set(out.variables) == set(m0.run().to_xr().variables)
+
+    out = out.compute()
+    m = crt.Model(scheme, nlayers=30, leaf_r=leaf_r[3], psi=psi[1]).run()
+    np.testing.assert_allclose(out.F.isel(member=3, time=1), m.out["F"], rtol=1e-12)
+
+
+@pytest.mark.parametrize("scheme", ["2s", "n79"])
+def test_batch_float32(scheme):
+    m = crt.Model(scheme, nlayers=30, dtype=np.float32)
+    b = crt.ColumnBatch.from_model(m, psi=[0.2, 0.5, 0.8]).run()
+    assert all(b.out[k].dtype == np.float32 for k in crt.solvers.RET_KEYS_ALL_SCHEMES)
+    m.update_p(psi=0.5).run()
+    np.testing.assert_allclose(b.out["F"][1], m.out["F"], rtol=1e-5, atol=1e-4 * m.out["F"].max())
+
+
+@pytest.mark.parametrize("scheme", ["2s", "n79"])
+def test_batch_night_columns(scheme):
+    psi = np.deg2rad([30, 95, 60, 90])
+    b = crt.ColumnBatch(scheme, nlayers=30, psi=psi).run()
+    for k, v in b.out.items():
+        assert (v[[1, 3]] == 0).all()
+    for v in b.out_extra.values():
+        assert (v[[1, 3]] == 0).all()
+    b_day = crt.ColumnBatch(scheme, nlayers=30, psi=psi[[0, 2]]).run()
+    for k, v in b_day.out.items():
+        np.testing.assert_array_equal(b.out[k][[0, 2]], v)
+
+    b.update_p(psi=np.deg2rad([100, 120])).run()
+    assert all((v == 0).all() for v in b.out.values())
+
+
+def test_batch_all_night():
+    b = crt.ColumnBatch("bf", nlayers=30, psi=np.deg2rad([30, 60])).run()
+    assert b.out_extra
+    b.update_p(psi=np.deg2rad([95, 100])).run()
+    assert all((v == 0).all() for v in b.out.values())
+    assert not b.out_extra  # no stale values from the previous run
+    ds = b.to_xr()
+    assert (ds.F == 0).all()
+    assert not any(k.endswith("_scheme") for k in ds.data_vars)
+
+
+def test_batch_update_validated_before_applied():
+    b = crt.ColumnBatch("2s", nlayers=30, psi=np.deg2rad([10, 20]))
+    leaf_r = b.model._p["leaf_r"]
+    with pytest.warns(UserWarning, match="Reverting"):
+        b.update_p(leaf_r=leaf_r * 0.5, lai=np.ones((2, 30)))  # shared valid, column invalid
+    assert b.model._p["leaf_r"] is leaf_r
+    assert "lai" not in b._pc
+
+
+def test_batch_clump():
+    clump = np.array([0.6, 0.9])
+    b = crt.ColumnBatch("zq_pa", nlayers=30, clump=clump).run()
+    for i in range(2):
+        m = crt.Model("zq_pa", nlayers=30, clump=clump[i]).run()
+        np.testing.assert_allclose(b.out["F"][i], m.out["F"], rtol=1e-12)
+
+    # not used by the scheme
+    b = crt.ColumnBatch("2s", nlayers=30)
+    with pytest.warns(UserWarning, match="does not use `clump`"):
+        b.update_p(clump=clump)
+    assert "clump" not in b._pc
@@ -0,0 +1,57 @@
+"""
+Test the import time of crt1d
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["matplotlib", "xarray", "pandas", "scipy.integrate", "scipy.stats", "dask"]
+
+IMPORT_TIME_BUDGET = 0.5  # s, excluding NumPy (~ 0.05 s typically)
+
+
+def _import_crt1d(then=""):
+    """Import crt1d in a fresh interpreter (after NumPy) and execute code `then`,
+    returning the import time and the heavy modules imported."""
+    code = f"""
+import json, sys, time
+import numpy
+t0 = time.perf_counter()
+import crt1d
+t = time.perf_counter() - t0
+{then}
+print(json.dumps([t, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))
+"""
+    res = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(res.stdout)
+
+
+def test_no_heavy_imports():
+    _, heavy = _import_crt1d()
+    assert heavy == []
+
+
+def test_default_model_no_xarray():
+    _, heavy = _import_crt1d("crt1d.Model().run()")
+    assert "xarray" not in heavy
+    assert "pandas" not in heavy
+
+
+def test_import_time():
+    t = min(_import_crt1d()[0] for _ in range(3))
+    assert t < IMPORT_TIME_BUDGET
+
+
+def test_lazy_submodules():
+    code = "import crt1d; crt1d.leaf_area; crt1d.data; crt1d.cases; crt1d.spectra"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_lazy_diagnostics():
+    import crt1d
+
+    assert crt1d.diagnostics.__name__ == "crt1d.diagnostics"
+    with pytest.raises(AttributeError):
+        crt1d.not_a_module
@@ -0,0 +1,58 @@
+"""
+Test the JAX backend (crt1d.solvers._jax)
+"""
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+jax = pytest.importorskip("jax")
+
+JAX_ARGS = ["psi", "I_dr0_all", "I_df0_all", "lai", "leaf_t", "leaf_r", "soil_r"]
+
+
+@pytest.mark.parametrize("scheme", ["2s", "bf", "g77", "bl"])
+def test_jax_backend(scheme):
+    m = crt.Model(scheme, nlayers=30).run()
+    m_jax = crt.Model(scheme, nlayers=30, backend="jax").run()
+    for k, v in m.out_all.items():
+        np.testing.assert_allclose(m_jax.out_all[k], v, rtol=1e-12, atol=1e-12 * np.abs(v).max())
+
+
+@pytest.mark.parametrize("scheme", ["2s", "bf"])
+def test_jax_grad(scheme):
+    m = crt.Model(scheme, nlayers=30, backend="jax")
+    f = m.jax_solver()
+    p = m.copy_p()
+    inputs = {k: p[k] for k in JAX_ARGS if k in m.scheme["args"]}
+
+    def absorbed(x, k):
+        out = f(**{**inputs, k: x})
+        return (out["I_dr"][-1] + out["I_df_d"][-1] - out["I_df_u"][-1]).sum()
+
+    for k in ["psi", "lai", "leaf_r"]:
+        x = np.asarray(inputs[k], dtype=float)
+        g = jax.grad(absorbed)(x, k)
+        # central differences, for a single element
+        i = np.unravel_index(np.argmax(np.abs(g)), g.shape)
+        dx = np.zeros_like(x)
+        dx[i] = 1e-6
+        g_fd = (absorbed(x + dx, k) - absorbed(x - dx, k)) / 2e-6
+        np.testing.assert_allclose(g[i], g_fd, rtol=1e-5)
+
+
+def test_jax_vmap():
+    m = crt.Model("2s", nlayers=30, backend="jax")
+    f = m.jax_solver()
+    p = m.copy_p()
+    inputs = {k: p[k] for k in JAX_ARGS}
+    psi = np.deg2rad([10, 40, 70])
+    out = jax.vmap(lambda psi_: f(**{**inputs, "psi": psi_}))(psi)
+    for i, psi_i in enumerate(psi):
+        m.update_p(psi=psi_i).run()
+        np.testing.assert_allclose(out["I_df_d"][i], m.out["I_df_d"], rtol=1e-12)
+
+
+def test_jax_unsupported_scheme():
+    with pytest.raises(ValueError):
+        crt.Model("zq", backend="jax")
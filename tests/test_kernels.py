@@ -0,0 +1,85 @@
+"""
+Test crt1d.kernels
+"""
+import threading
+
+import numpy as np
+import pytest
+
+import crt1d as crt
+import crt1d.data
+import crt1d.spectra
+from crt1d import kernels
+from crt1d.solvers.common import tdma
+
+pytest.importorskip("numba")
+
+
+def test_tdma():
+    rng = np.random.default_rng(0)
+    a, c = rng.uniform(-1, 0, (2, 20, 3, 4))
+    b = 2.5 + rng.uniform(size=(20, 3, 4))
+    d = rng.normal(size=(20, 3, 4))
+    x_np = tdma(a, b, c, d)
+    with kernels.use("numba"):
+        assert kernels.current() == "numba"
+        x_nb = tdma(a, b, c, d)
+    assert kernels.current() == "numpy"
+    np.testing.assert_allclose(x_nb, x_np, rtol=1e-14)
+
+
+def test_smear_tuv():
+    ds = crt.data.load_default_sp2(midpt=False)
+    x, y = ds.wl0.values, ds.SI_dr.values
+    bins = np.linspace(0.3, 2.6, 200)
+    y_np = crt.spectra.smear_tuv(x, y, bins)
+    with kernels.use("numba"):
+        y_nb = crt.spectra.smear_tuv(x, y, bins)
+    np.testing.assert_allclose(y_nb, y_np, rtol=1e-14)
+
+
+def test_model_run():
+    m = crt.Model("n79", nlayers=30).run()
+    out = {k: v.copy() for k, v in m.out.items()}
+    m.run(kernels="numba")
+    for k, v in out.items():
+        np.testing.assert_allclose(m.out[k], v, rtol=1e-12, atol=1e-12 * np.abs(v).max())
+
+
+def test_model_run_threads(monkeypatch):
+    calls = []
+    numba_kernel = kernels.numba_kernel
+
+    def recording_numba_kernel(name):
+        calls.append(threading.current_thread())
+        return numba_kernel(name)
+
+    monkeypatch.setattr(kernels, "numba_kernel", recording_numba_kernel)
+    m = crt.Model("n79", nlayers=30)
+    m.run(kernels="numba", n_threads=3)
+    assert calls  # the band chunks, solved in the worker threads
+    assert threading.current_thread() not in calls
+
+
+def test_use_thread_local():
+    entered, done = threading.Event(), threading.Event()
+
+    def other():
+        with kernels.use("numba"):
+            entered.set()
+            done.wait(5)
+
+    t = threading.Thread(target=other)
+    t.start()
+    try:
+        assert entered.wait(5)
+        assert kernels.current() == "numpy"  # not affected by the other thread
+    finally:
+        done.set()
+        t.join()
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        with kernels.use("fortran"):
+            pass
@@ -0,0 +1,60 @@
+"""
+Test crt1d.leaf_angle
+"""
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+import crt1d as crt
+from crt1d import leaf_angle as la
+
+
+@pytest.mark.parametrize(
+    "spec, G_fn",
+    [
+        (la.Spherical(), la.G_spherical),
+        (la.Horizontal(), la.G_horizontal),
+        (la.Vertical(), la.G_vertical),
+        (la.Ellipsoidal(x=1.5), lambda psi: la.G_ellipsoidal(psi, 1.5)),
+        (la.Ellipsoidal(x=0.7, approx=True), lambda psi: la.G_ellipsoidal_approx(psi, 0.7)),
+        (la.Bonan(xl=0.2), lambda psi: la.G_ellipsoidal_approx_bonan(psi, 0.2)),
+    ],
+)
+def test_spec(spec, G_fn):
+    psi = np.linspace(0, 1.5, 7)
+    np.testing.assert_allclose(spec(psi), G_fn(psi), rtol=1e-15)
+    assert np.shape(spec.G(psi)) == psi.shape
+    np.testing.assert_allclose(spec.K_b(psi), G_fn(psi) / np.cos(psi), rtol=1e-15)
+    assert np.isscalar(spec(0.3))
+
+    spec2 = pickle.loads(pickle.dumps(spec))
+    assert spec2 == spec and hash(spec2) == hash(spec)
+
+
+def test_spec_cache_key():
+    assert la.Ellipsoidal(x=1.5) == la.Ellipsoidal(1.5)
+    assert la.Ellipsoidal(x=1.5) != la.Ellipsoidal(1.5, approx=True)
+    assert len({la.Bonan(0.1), la.Bonan(0.1), la.Spherical()}) == 2
+
+
+def _run(m):
+    return m.run().out["F"]
+
+
+def test_model_picklable():
+    m = crt.Model("bl", nlayers=30, G_fn=la.Bonan(xl=0.1)).run()
+    m2 = pickle.loads(pickle.dumps(m))
+    np.testing.assert_array_equal(m2.run().out["F"], m.out["F"])
+
+    assert isinstance(crt.Model("2s").copy_p()["G_fn"], la.Ellipsoidal)  # default case
+    pickle.dumps(crt.Model("2s").run())
+    with ProcessPoolExecutor(1) as executor:  # (spawned or forked, the model is pickled)
+        F = executor.submit(_run, m).result()
+    np.testing.assert_array_equal(F, m.out["F"])
+
+
+def test_spec_abstract():
+    with pytest.raises(TypeError):
+        la.LeafAngleDist()
@@ -0,0 +1,269 @@
+"""
+Test crt1d.model
+"""
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+
+@pytest.mark.parametrize("scheme", ["2s", "4s", "bl", "n79", "zq", "zq_pa"])
+def test_geom_reused_and_consistent(scheme):
+    m = crt.Model(scheme, nlayers=30).run()
+    geom = m.geom
+    m.update_p(psi=np.deg2rad(50)).run()
+    assert m.geom is geom  # same canopy, so not recomputed
+
+    # Same results as the solver computing the canopy quantities itself
+    p = m._p
+    sol = m.scheme["solver"](**{k: p[k] for k in m.scheme["args"]})
+    for k in crt.solvers.RET_KEYS_ALL_SCHEMES:
+        np.testing.assert_allclose(m.out[k], sol[k], rtol=1e-12)
+
+    # New LAI profile -> new geom
+    m.update_p(lai=p["lai"] * 1.5)
+    assert m.geom is not geom
+
+
+@pytest.mark.parametrize("scheme", ["n79", "zq", "zq_pa"])
+def test_solver_cache(scheme):
+    m = crt.Model(scheme, nlayers=30).run()
+    assert len(m._solver_cache) == 1
+    fac = next(iter(m._solver_cache.values()))
+
+    # New psi -> factorization reused
+    m.update_p(psi=np.deg2rad(50)).run()
+    assert len(m._solver_cache) == 1
+    assert next(iter(m._solver_cache.values())) is fac
+
+    # Same results without the cache
+    p = m._p
+    sol = m.scheme["solver"](**{k: p[k] for k in m.scheme["args"]})
+    for k in crt.solvers.RET_KEYS_ALL_SCHEMES:
+        np.testing.assert_allclose(m.out[k], sol[k], rtol=1e-12)
+
+    # New leaf optical properties -> cache cleared
+    m.update_p(leaf_r=p["leaf_r"] * 0.9)
+    assert not m._solver_cache
+
+
+@pytest.mark.parametrize("scheme", list(crt.solvers.AVAILABLE_SCHEMES))
+def test_superpose(scheme):
+    m = crt.Model(scheme, nlayers=30).run()
+    out = {k: v.copy() for k, v in m.out_all.items()}
+    m.run(superpose=True)
+    for k, v in out.items():
+        np.testing.assert_allclose(m.out_all[k], v, rtol=1e-9, atol=1e-9 * np.abs(v).max())
+
+    # New spectra, same canopy -> unit responses reused
+    p = m.copy_p()
+    m.update_p(I_dr0_all=p["I_dr0_all"] * 0.3, I_df0_all=p["I_df0_all"] * 2)
+    m.run(superpose=True)
+    assert len(m._unit_responses) == 1
+    out = m.out_all
+    m.run()
+    for k, v in out.items():
+        np.testing.assert_allclose(v, m.out_all[k], rtol=1e-9, atol=1e-9 * np.abs(v).max())
+
+    # New psi -> new unit responses
+    m.update_p(psi=np.deg2rad(50)).run(superpose=True)
+    assert len(m._unit_responses) == 2
+
+
+def test_unit_responses_maxbytes():
+    m = crt.Model("2s", nlayers=30).run(superpose=True)
+    (nbytes,) = [n for _, _, n in m._unit_responses.values()]
+    m.unit_responses_maxbytes = 2.5 * nbytes
+    for psi in np.deg2rad([10, 20, 30]):
+        m.update_p(psi=psi).run(superpose=True)
+    assert len(m._unit_responses) == 2  # oldest dropped
+
+    # the most recent are kept even if over the limit
+    m.unit_responses_maxbytes = 0
+    m.update_p(psi=np.deg2rad(40)).run(superpose=True)
+    assert len(m._unit_responses) == 1
+
+
+@pytest.mark.parametrize("scheme", list(crt.solvers.AVAILABLE_SCHEMES))
+def test_n_threads(scheme):
+    m = crt.Model(scheme, nlayers=30).run()
+    out = {k: v.copy() for k, v in m.out_all.items()}
+    m.run(n_threads=3)
+    assert m.out_all.keys() == out.keys()
+    for k, v in out.items():
+        np.testing.assert_array_equal(m.out_all[k], v)
+
+
+@pytest.mark.parametrize("scheme", ["2s", "bf", "zq"])
+def test_optics_classes(scheme):
+    m = crt.Model(scheme, nlayers=30)
+    p = m.copy_p()
+    nwl = p["wl"].size
+
+    # duplicate optics in the second half of the bands and zero irradiance in one band
+    leaf_r, leaf_t, soil_r = p["leaf_r"], p["leaf_t"], p["soil_r"]
+    for x in (leaf_r, leaf_t, soil_r):
+        x[nwl // 2 :] = x[nwl // 2]
+    I_dr0, I_df0 = p["I_dr0_all"], p["I_df0_all"]
+    I_dr0[3] = I_df0[3] = 0
+    m.update_p(leaf_r=leaf_r, leaf_t=leaf_t, soil_r=soil_r, I_dr0_all=I_dr0, I_df0_all=I_df0)
+
+    m.run()
+    out = {k: v.copy() for k, v in m.out.items()}
+    m.run(optics_tol=0)
+    assert m.band_classes["n_bands_lit"] == nwl - 1
+    assert m.band_classes["n_classes"] == nwl // 2  # first half minus band 3, plus second half
+    assert m.band_classes["rel_err_est"] == 0
+    for k, v in out.items():
+        np.testing.assert_allclose(m.out[k], v, rtol=1e-9, atol=1e-12 * np.abs(v).max())
+
+    m.run(optics_tol=0.01)
+    assert m.band_classes["optics_max_dev"] <= 0.01
+    assert 0 < m.band_classes["rel_err_est"] < 0.05
+    for k, v in out.items():
+        np.testing.assert_allclose(
+            m.out[k], v, atol=m.band_classes["rel_err_est"] * np.abs(v).max()
+        )
+
+
+@pytest.mark.parametrize("scheme", ["2s", "n79"])
+def test_run_series(scheme):
+    m = crt.Model(scheme, nlayers=30)
+    p = m.copy_p()
+    times = np.arange(
+        "2021-06-21T00", "2021-06-22T00", np.timedelta64(2, "h"), dtype="datetime64[h]"
+    )
+    nt = times.size
+    I_dr0 = p["I_dr0_all"] * np.linspace(0, 1, nt)[:, np.newaxis]
+
+    ds = m.run_series(times, 60, 25, {"I_dr0_all": I_dr0}, psi_bin=np.deg2rad(5))
+    assert ds.I_dr.dims == ("time", "z", "wl")
+    assert m.copy_p()["psi"] == p["psi"]  # model state not modified
+
+    psi = ds.psi.values
+    night = psi >= np.pi / 2
+    assert night.any() and not night.all()
+    assert (ds.F[night] == 0).all()
+    for i in np.flatnonzero(~night):
+        m.update_p(psi=psi[i], I_dr0_all=I_dr0[i]).run()
+        for k, v in m.out.items():
+            np.testing.assert_allclose(ds[k][i], v, rtol=1e-9, atol=1e-9 * np.abs(v).max())
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_run_sensitivity(max_workers):
+    m0 = crt.Model("2s", nlayers=30).run()
+    F0 = m0.out["F"].copy()
+    p_sets = {
+        "scheme": ["2s", "bl"],
+        "psi": list(np.deg2rad([20, 50])),
+        "soil_r": [np.full(m0.nwl, 0.1), np.full(m0.nwl, 0.3)],
+    }
+    ds = crt.model.run_sensitivity(m0, p_sets, max_workers=max_workers, chunksize=3)
+    assert ds.F.dims == ("scheme", "psi", "soil_r", "z", "wl")
+    assert list(ds.scheme.values) == ["2s", "bl"]
+    np.testing.assert_array_equal(ds.soil_r, [0, 1])
+    np.testing.assert_array_equal(m0.out["F"], F0)  # base case not modified
+
+    m = crt.Model("bl", nlayers=30, psi=np.deg2rad(50), soil_r=p_sets["soil_r"][1]).run()
+    np.testing.assert_allclose(ds.F.sel(scheme="bl").isel(psi=1, soil_r=1), m.out["F"])
+
+
+@pytest.mark.parametrize("scheme", list(crt.solvers.AVAILABLE_SCHEMES))
+def test_float32(scheme):
+    m64 = crt.Model(scheme, nlayers=30).run()
+    m64.calc_absorption()
+    m = crt.Model(scheme, nlayers=30, dtype=np.float32).run()
+    m.calc_absorption()
+    for k, v in m64.out_all.items():
+        assert m.out_all[k].dtype == np.float32
+        np.testing.assert_allclose(m.out_all[k], v, rtol=0, atol=1e-4 * np.abs(v).max())
+    for k, v in m.absorption.items():
+        assert v.dtype == np.float32
+
+
+def test_float32_2s_dense_canopy():
+    # Sellers's original formulation overflows (exp(h L)) in single precision
+    m = crt.Model("2s", nlayers=30, lai=np.linspace(400, 0, 30), dtype=np.float32)
+    m.run()
+    for v in m.out.values():
+        assert np.isfinite(v).all()
+
+
+def test_invalid_dtype():
+    with pytest.raises(ValueError):
+        crt.Model("2s", dtype=np.int32)
+
+
+def test_incremental_check():
+    m = crt.Model("2s", nlayers=30)
+    p = m._p
+    dlai, wle = p["dlai"], p["wle"]
+
+    m.update_p(psi=np.deg2rad(50))
+    assert p["mu"] == np.cos(np.deg2rad(50))
+    assert p["K_b"] == p["G_fn"](np.deg2rad(50)) / p["mu"]
+    assert p["dlai"] is dlai and p["wle"] is wle  # not recomputed
+
+    m.update_p(lai=p["lai"] * 2)
+    assert p["dlai"] is not dlai
+    np.testing.assert_allclose(p["dlai"], dlai * 2)
+    assert p["lai_tot"] == m.copy_p()["lai"][0]
+
+    m.update_p(G_fn=crt.leaf_angle.G_horizontal)
+    assert m.copy_p()["K_b"] == pytest.approx(1)  # G = cos(psi)
+
+    # failed update is reverted, derived parameters included
+    with pytest.warns(UserWarning, match="Reverting"):
+        m.update_p(psi=0.1, lai=p["lai"][::-1])
+    assert m._p["mu"] == np.cos(np.deg2rad(50))
+    assert not m._changed
+
+
+def test_shared_parameter_arrays():
+    m1 = crt.Model("2s", nlayers=30)
+    m2 = crt.Model("bl", nlayers=30)
+    assert m1._p["leaf_r"] is m2._p["leaf_r"]  # default case loaded once
+    with pytest.raises(ValueError, match="read-only"):
+        m1._p["leaf_r"][0] = 0
+
+    m3 = deepcopy(m1)
+    assert m3._p["I_dr0_all"] is m1._p["I_dr0_all"]
+    m3.update_p(leaf_r=m1.copy_p()["leaf_r"] * 0.5)
+    assert m3._p["leaf_r"] is not m1._p["leaf_r"]
+    np.testing.assert_array_equal(m1._p["leaf_r"], m2._p["leaf_r"])
+
+    p = m1.copy_p()
+    p["leaf_r"][0] = 0  # copies are writeable
+
+    # rollback restores the shared arrays
+    leaf_r = m1._p["leaf_r"]
+    with pytest.warns(UserWarning, match="Reverting"):
+        m1.update_p(leaf_r=p["leaf_r"], wl_leafsoil=p["wl_leafsoil"][:-1])
+    assert m1._p["leaf_r"] is leaf_r
+
+
+@pytest.mark.parametrize("scheme", ["2s", "n79"])
+def test_float32_series_and_sweep(scheme):
+    m = crt.Model(scheme, nlayers=30, dtype=np.float32)
+    times = np.arange(
+        "2021-06-21T06", "2021-06-21T18", np.timedelta64(3, "h"), dtype="datetime64[h]"
+    )
+    ds = m.run_series(times, 40, -100)
+    assert all(ds[k].dtype == np.float32 for k in crt.solvers.RET_KEYS_ALL_SCHEMES)
+
+    ds = crt.model.run_sensitivity(m, {"psi": [0.2, 0.4]}, max_workers=1)
+    assert ds.F.dtype == np.float32
+
+
+def test_run_sensitivity_invalid_case():
+    m0 = crt.Model("2s", nlayers=30)
+    lai = m0.copy_p()["lai"]
+    p_sets = {"lai": [lai, lai[::-1], 2 * lai]}  # second is invalid (LAI increasing)
+    with pytest.warns(UserWarning, match="Outputs set to NaN"):
+        ds = crt.model.run_sensitivity(m0, p_sets, max_workers=1)
+    assert np.isnan(ds.F[1]).all()
+    assert np.isfinite(ds.F[[0, 2]]).all()
+    assert not crt.model._sweep_state  # cleared
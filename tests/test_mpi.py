@@ -0,0 +1,77 @@
+"""
+Test crt1d.mpi
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+pytest.importorskip("mpi4py")
+
+from crt1d.mpi import run_columns_mpi  # noqa: E402
+from crt1d.mpi import run_sensitivity_mpi  # noqa: E402
+
+P_SETS = {"scheme": ["bl", "zq"], "psi": [0.2, 0.5, 0.9], "mla": [30, 57]}
+
+SCRIPT = """
+import sys
+import numpy as np
+import crt1d as crt
+from crt1d.mpi import run_sensitivity_mpi
+from mpi4py import MPI
+
+m0 = crt.Model("2s", nlayers=20)
+p_sets = {p_sets}
+ds = run_sensitivity_mpi(m0, p_sets, balance=sys.argv[1], chunksize=2)
+if MPI.COMM_WORLD.Get_rank() == 0:
+    ds.to_netcdf(sys.argv[2])
+else:
+    assert ds is None
+"""
+
+
+def test_sweep_one_rank():
+    m0 = crt.Model("2s", nlayers=20)
+    ds = run_sensitivity_mpi(m0, P_SETS)
+    ref = crt.model.run_sensitivity(m0, P_SETS, max_workers=1)
+    np.testing.assert_array_equal(ds.F, ref.F)
+
+
+def test_columns_one_rank():
+    lai = crt.Model("2s", nlayers=20).copy_p()["lai"] * np.linspace(0.5, 2, 5)[:, np.newaxis]
+    b = crt.ColumnBatch("n79", nlayers=20, lai=lai, psi=np.linspace(0.1, 1.2, 5))
+    ref = {k: v.copy() for k, v in b.run().out.items()}
+    run_columns_mpi(b, chunksize=2)
+    for k, v in ref.items():
+        np.testing.assert_array_equal(b.out[k], v)
+
+
+def test_columns_one_rank_night_chunk():
+    psi = np.deg2rad([30, 60, 95, 100, 40])  # second chunk all night
+    b = crt.ColumnBatch("bf", nlayers=20, psi=psi)
+    ref = {k: v.copy() for k, v in b.run().out_extra.items()}
+    run_columns_mpi(b, chunksize=2)
+    assert b.out_extra.keys() == ref.keys()
+    for k, v in ref.items():
+        np.testing.assert_array_equal(b.out_extra[k], v)
+
+
+@pytest.mark.skipif(shutil.which("mpirun") is None, reason="no mpirun")
+@pytest.mark.parametrize("balance", ["static", "dynamic"])
+def test_sweep_mpirun(tmp_path, balance):
+    xr = pytest.importorskip("xarray")
+    script = tmp_path / "sweep.py"
+    script.write_text(SCRIPT.format(p_sets=repr(P_SETS)))
+    fp = tmp_path / "out.nc"
+    env = {**os.environ, "OMPI_ALLOW_RUN_AS_ROOT": "1", "OMPI_ALLOW_RUN_AS_ROOT_CONFIRM": "1"}
+    cmd = ["mpirun", "--oversubscribe", "-n", "3", sys.executable, str(script), balance, str(fp)]
+    subprocess.run(cmd, check=True, env=env, timeout=120)
+
+    ref = crt.model.run_sensitivity(crt.Model("2s", nlayers=20), P_SETS, max_workers=1)
+    with xr.open_dataset(fp) as ds:
+        np.testing.assert_array_equal(ds.F, ref.F)
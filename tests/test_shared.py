@@ -0,0 +1,49 @@
+"""
+Test crt1d.shared
+"""
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+import crt1d as crt
+from crt1d.model import run_sensitivity
+from crt1d.shared import attach
+from crt1d.shared import SharedArrays
+
+
+def test_shared_arrays():
+    arrays = {"a": np.arange(5.0), "b": np.ones((3, 2), dtype=np.float32), "c": np.array(7)}
+    with SharedArrays(arrays) as shared:
+        arrays_ = attach(shared.spec)
+        assert arrays_.keys() == arrays.keys()
+        for k, a in arrays.items():
+            assert arrays_[k].dtype == a.dtype
+            np.testing.assert_array_equal(arrays_[k], a)
+            with pytest.raises(ValueError):
+                arrays_[k][...] = 0
+
+
+@pytest.mark.parametrize("mp_context", ["fork", "spawn"])
+def test_run_sensitivity_shared_memory(mp_context, monkeypatch):
+    if mp_context not in mp.get_all_start_methods():
+        pytest.skip(f"{mp_context!r} start method not available")
+    if mp_context == "fork":
+        # forked workers share the parent's memory already
+        def no_share(*args):
+            raise AssertionError("shared memory used with fork")
+
+        monkeypatch.setattr(crt.model, "_sweep_share", no_share)
+
+    m0 = crt.Model("2s", nlayers=20)
+    wl = m0._p["wl_leafsoil"]
+    p_sets = {
+        "psi": np.deg2rad([20, 60]),
+        "leaf_t": [m0._p["leaf_t"], m0._p["leaf_t"] * 0.8],
+        "soil_r": [np.full_like(wl, r) for r in [0.1, 0.2]],
+        "scheme": ["2s", "zq"],
+    }
+    ds = run_sensitivity(m0, p_sets, max_workers=2, mp_context=mp_context, shared_memory=True)
+    ds_ref = run_sensitivity(m0, p_sets, max_workers=1)
+    for k in ["I_dr", "I_df_d", "I_df_u", "F"]:
+        np.testing.assert_array_equal(ds[k].values, ds_ref[k].values)
@@ -0,0 +1,20 @@
+"""
+Test crt1d.solar
+"""
+import numpy as np
+
+from crt1d.solar import solar_zenith_angle
+
+
+def test_solar_zenith_noon():
+    # Approximate solar noon at the solstices at Greenwich
+    times = ["2021-06-21T12:02", "2021-12-21T11:58"]
+    sza = np.rad2deg(solar_zenith_angle(times, 51.48, 0))
+    np.testing.assert_allclose(sza, [51.48 - 23.44, 51.48 + 23.44], atol=0.1)
+
+
+def test_solar_zenith_vectorized():
+    times = np.arange("2021-01-01", "2022-01-01", np.timedelta64(1, "h"), dtype="datetime64[ns]")
+    psi = solar_zenith_angle(times, 40, -105)
+    assert psi.shape == times.shape
+    assert 0.4 < (psi < np.pi / 2).mean() < 0.6  # about half of the hours are night
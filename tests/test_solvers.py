@@ -0,0 +1,89 @@
+"""
+Test crt1d.solvers
+"""
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+BAND_KEYS = ["I_dr0_all", "I_df0_all", "leaf_r", "leaf_t", "soil_r"]
+
+
+def _solver_args(m):
+    """Solver keyword arguments for the scheme currently assigned to model `m`."""
+    p = m._p
+    return {k: p[k] for k in m.scheme["args"]}
+
+
+@pytest.mark.parametrize("scheme", ["2s", "4s", "bf", "g77", "bl", "n79", "zq", "zq_pa"])
+def test_band_vectorized_matches_single_band(scheme):
+    m = crt.Model(scheme, nlayers=30)
+    args = _solver_args(m)
+    solver = m.scheme["solver"]
+    sol = solver(**args)
+
+    for i in [0, 40, m.nwl - 1]:
+        args_i = {k: (v[i : i + 1] if k in BAND_KEYS else v) for k, v in args.items()}
+        sol_i = solver(**args_i)
+        for k in crt.solvers.RET_KEYS_ALL_SCHEMES:
+            np.testing.assert_allclose(sol_i[k][:, 0], sol[k][:, i], rtol=1e-13, atol=0)
+
+
+@pytest.mark.parametrize("solver_name", ["tdma", "solve_tridiag"])
+def test_tridiag_batched(solver_name):
+    from scipy.linalg import solve_banded
+
+    from crt1d.solvers import common
+
+    solver = getattr(common, solver_name)
+
+    rng = np.random.default_rng(0)
+    n, nb = 20, 5
+    a = rng.uniform(-1, 0, (n, nb))
+    c = rng.uniform(-1, 0, (n, nb))
+    b = 2.5 + rng.uniform(0, 1, (n, nb))  # diagonally dominant
+    d = rng.normal(size=(n, nb))
+
+    x = solver(a, b, c, d)
+
+    for i in range(nb):
+        ab = np.zeros((3, n))
+        ab[0, 1:] = c[:-1, i]
+        ab[1] = b[:, i]
+        ab[2, :-1] = a[1:, i]
+        np.testing.assert_allclose(x[:, i], solve_banded((1, 1), ab, d[:, i]), rtol=1e-12)
+
+
+def test_4s_eig_matches_bvp():
+    m = crt.Model("4s", nlayers=30)
+    args = _solver_args(m)
+    solver = m.scheme["solver"]
+    sol_eig = solver(**args, method="eig")
+    sol_bvp = solver(**args, method="bvp")
+    for k in crt.solvers.RET_KEYS_ALL_SCHEMES:
+        np.testing.assert_allclose(sol_eig[k], sol_bvp[k], rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "G_fn",
+    [
+        crt.leaf_angle.G_spherical,
+        crt.leaf_angle.G_vertical,
+        crt.leaf_angle.G_horizontal,
+        lambda psi: crt.leaf_angle.G_ellipsoidal_approx(psi, 3),
+    ],
+)
+def test_tau_df_gauss(G_fn):
+    from crt1d.solvers.common import tau_df_fn
+    from crt1d.solvers.common import tau_df_interp
+
+    K_b_fn = lambda psi: G_fn(psi) / np.cos(psi)  # noqa: E731
+    lai = np.r_[0, 0.001, 0.05, 0.5, 2, 8]
+
+    res_gauss = tau_df_fn(K_b_fn, lai, method="gauss")
+    res_quad = tau_df_fn(K_b_fn, lai, method="quad")
+    np.testing.assert_allclose(res_gauss, res_quad, rtol=1e-7)
+    assert isinstance(tau_df_fn(K_b_fn, 0.5), float)
+
+    res_interp = tau_df_interp(K_b_fn, lai.max())(lai)
+    np.testing.assert_allclose(res_interp, res_gauss, rtol=1e-6)
@@ -0,0 +1,62 @@
+"""
+Test crt1d.stepper
+"""
+import numpy as np
+import pytest
+
+import crt1d as crt
+
+
+@pytest.mark.parametrize("scheme", list(crt.solvers.AVAILABLE_SCHEMES))
+def test_stepper_matches_model(scheme):
+    m = crt.Model("2s", nlayers=30)
+    st = crt.Stepper(m, scheme)
+    assert m.scheme["name"] == "2s"  # model not modified
+    p = m.copy_p()
+    for psi, f in [(0.3, 1.0), (1.1, 0.5), (0.3, 2.0)]:
+        I_dr0, I_df0 = f * p["I_dr0_all"], p["I_df0_all"] / f
+        out = st.step(psi, I_dr0, I_df0)
+        assert out.keys() == set(crt.solvers.RET_KEYS_ALL_SCHEMES)
+
+        m_ref = crt.Model(scheme, nlayers=30, psi=psi, I_dr0_all=I_dr0)
+        m_ref.update_p(I_df0_all=I_df0).run()
+        for k, v in m_ref.out.items():
+            np.testing.assert_allclose(out[k], v, rtol=1e-12, atol=1e-12)
+
+
+def test_stepper_out():
+    st = crt.Stepper(crt.Model("bl", nlayers=30))
+    p = st.model.copy_p()
+    F = np.full((st.nlev, st.nwl, 2), np.nan)
+    out = {"F": F[..., 1]}  # caller-owned (non-contiguous) buffer, subset of the outputs
+    assert st.step(0.5, p["I_dr0_all"], p["I_df0_all"], out=out) is out
+    np.testing.assert_array_equal(F[..., 1], st.step(0.5, p["I_dr0_all"], p["I_df0_all"])["F"])
+    assert np.isnan(F[..., 0]).all()
+
+    st.step(np.pi / 2, p["I_dr0_all"], p["I_df0_all"], out=out)  # night
+    assert (F[..., 1] == 0).all()
+
+
+@pytest.mark.parametrize("scheme", ["2s", "bl", "bf", "n79"])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_stepper_out_buffers(scheme, dtype):
+    m = crt.Model(scheme, nlayers=30, dtype=dtype)
+    st = crt.Stepper(m)
+    p = m.copy_p()
+    buf = st.empty_out()
+    arrays = dict(buf)
+    for psi in [0.3, 1.1]:
+        out = st.step(psi, p["I_dr0_all"], p["I_df0_all"], out=buf)
+        assert out is buf
+        assert all(out[k] is v for k, v in arrays.items())
+
+        m.update_p(psi=psi).run()
+        for k, v in m.out.items():
+            np.testing.assert_allclose(buf[k], v, rtol=1e-12, atol=1e-12)
+
+
+def test_stepper_float32():
+    st = crt.Stepper(crt.Model("n79", nlayers=30, dtype=np.float32))
+    p = st.model.copy_p()
+    out = st.step(0.5, p["I_dr0_all"], p["I_df0_all"])
+    assert all(v.dtype == np.float32 for v in out.values())